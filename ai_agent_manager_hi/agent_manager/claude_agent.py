@@ -3,15 +3,25 @@
 
 import json
 import logging
+import time
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
 import anthropic
 
+from hybrid_llm import state_fingerprint
 from permissions import check_action_permission, ActionResult
 
 logger = logging.getLogger('claude_agent_manager.claude')
 
+# Sensor states that mean an agent needs real analysis (routes the request to the full model)
+PROBLEM_STATES = frozenset({'critical', 'failed', 'error', 'warning', 'degraded', 'at_risk', 'unavailable'})
+
+# Full analyses are reused for near-identical inputs: LRU size and max age in seconds
+ANALYSIS_CACHE_SIZE = 64
+ANALYSIS_CACHE_TTL = 900
+
 
 # Tool definitions for Claude
 TOOLS = [
@@ -182,30 +192,50 @@ For actions, use this format:
 }
 """
 
+# System prompt as a cacheable block: tools + system form a stable prefix that
+# Anthropic prompt caching serves at a fraction of the input-token price
+SYSTEM_BLOCKS = [
+    {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+]
+
 
 class ClaudeAgentManager:
     """Claude-powered intelligent agent manager."""
 
-    def __init__(self, api_key: str, ha_client, autonomous: bool = True):
+    def __init__(self, api_key: str, ha_client, autonomous: bool = True,
+                 fast_model: Optional[str] = None):
         """Initialize the Claude agent.
 
         Args:
             api_key: Anthropic API key
             ha_client: HomeAssistantClient instance
             autonomous: Whether to allow autonomous actions
+            fast_model: Cheaper model used when no agent reports a problem
         """
         # Strip whitespace from API key (common copy-paste issue)
-        self.client = anthropic.Anthropic(api_key=api_key.strip() if api_key else "")
+        # Async client so the tool-use loop doesn't block the event loop during API calls
+        self.client = anthropic.AsyncAnthropic(api_key=api_key.strip() if api_key else "")
         self.ha_client = ha_client
         self.autonomous = autonomous
         self.model = "claude-sonnet-4-20250514"  # Use Sonnet for good balance of speed/capability
+        self.fast_model = fast_model or self.model
         self.conversation_history = []
 
+        # Analysis cache: fingerprint -> (time stored, analysis), LRU-bounded
+        self._analysis_cache: OrderedDict = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Prompt-cache token usage reported by the API
+        self.cache_creation_input_tokens = 0
+        self.cache_read_input_tokens = 0
+
     async def analyze_system(
         self,
         agent_states: Dict[str, Any],
         historical_patterns: Optional[List[Dict]] = None,
-        max_actions: int = 10
+        max_actions: int = 10,
+        escalated: bool = False
     ) -> Dict[str, Any]:
         """Analyze the current system state using Claude.
 
@@ -213,32 +243,76 @@ class ClaudeAgentManager:
             agent_states: Current state of all agents
             historical_patterns: Relevant historical patterns from learning system
             max_actions: Maximum autonomous actions allowed
+            escalated: The hybrid tiers asked for a full analysis - always use the full model
 
         Returns:
             Analysis results with issues, optimizations, and predictions
         """
+        model = self.model if escalated else self._select_model(agent_states, historical_patterns)
+
+        # Same (rounded) states, patterns, action budget and model as a recent analysis - reuse it
+        key = state_fingerprint(
+            agent_states,
+            [p.get('description') for p in historical_patterns or []],
+            max_actions,
+            model,
+            rounded=True
+        )
+        entry = self._analysis_cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] <= ANALYSIS_CACHE_TTL:
+            self._analysis_cache.move_to_end(key)
+            self.cache_hits += 1
+            logger.debug(f"Analysis cache hit ({self.cache_hits} hits, {self.cache_misses} misses)")
+            return dict(entry[1])
+        self.cache_misses += 1
+
         # Build the analysis prompt
         prompt = self._build_analysis_prompt(agent_states, historical_patterns, max_actions)
 
         try:
             # Call Claude with tool use capability
-            response = await self._call_claude(prompt)
+            response = await self._call_claude(prompt, model)
 
             # Parse the response
             analysis = self._parse_response(response)
 
+            if not analysis.get('error'):
+                self._analysis_cache[key] = (time.monotonic(), dict(analysis))
+                self._analysis_cache.move_to_end(key)
+                while len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+                    self._analysis_cache.popitem(last=False)
+
             return analysis
 
         except Exception as e:
             logger.error(f"Error in Claude analysis: {e}", exc_info=True)
             return {
                 'summary': f'Analysis failed: {str(e)}',
+                'error': str(e),
                 'issues': [],
                 'optimizations': [],
                 'predictions': [],
                 'observations': []
             }
 
+    def _select_model(
+        self,
+        agent_states: Dict[str, Any],
+        patterns: Optional[List[Dict]]
+    ) -> str:
+        """Use the full model only when patterns apply or an agent reports a problem."""
+        if patterns:
+            return self.model
+
+        for agent_name, agent_data in agent_states.items():
+            if agent_name.startswith('_'):
+                continue
+            for sensor_data in agent_data.get('sensors', {}).values():
+                if str(sensor_data.get('state', '')).lower() in PROBLEM_STATES:
+                    return self.model
+
+        return self.fast_model
+
     def _build_analysis_prompt(
         self,
         agent_states: Dict[str, Any],
@@ -293,19 +367,20 @@ Respond with structured JSON as specified in the system prompt.
 
         return prompt
 
-    async def _call_claude(self, prompt: str) -> str:
+    async def _call_claude(self, prompt: str, model: str) -> str:
         """Call Claude API with the analysis prompt."""
         messages = [
             {"role": "user", "content": prompt}
         ]
 
-        response = self.client.messages.create(
-            model=self.model,
+        response = await self.client.messages.create(
+            model=model,
             max_tokens=4096,
-            system=SYSTEM_PROMPT,
+            system=SYSTEM_BLOCKS,
             tools=TOOLS if self.autonomous else [],
             messages=messages
         )
+        self._record_cache_usage(response)
 
         # Handle tool use if requested
         while response.stop_reason == "tool_use":
@@ -316,13 +391,14 @@ Respond with structured JSON as specified in the system prompt.
             messages.append({"role": "assistant", "content": response.content})
             messages.append({"role": "user", "content": tool_results})
 
-            response = self.client.messages.create(
-                model=self.model,
+            response = await self.client.messages.create(
+                model=model,
                 max_tokens=4096,
-                system=SYSTEM_PROMPT,
+                system=SYSTEM_BLOCKS,
                 tools=TOOLS,
                 messages=messages
             )
+            self._record_cache_usage(response)
 
         # Extract text response
         for block in response.content:
@@ -331,6 +407,23 @@ Respond with structured JSON as specified in the system prompt.
 
         return ""
 
+    def get_stats(self) -> Dict[str, int]:
+        """Analysis cache and prompt-cache token counters."""
+        return {
+            'analysis_cache_hits': self.cache_hits,
+            'analysis_cache_misses': self.cache_misses,
+            'cache_creation_input_tokens': self.cache_creation_input_tokens,
+            'cache_read_input_tokens': self.cache_read_input_tokens
+        }
+
+    def _record_cache_usage(self, response) -> None:
+        """Accumulate prompt-cache writes/reads from a Messages API response."""
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            return
+        self.cache_creation_input_tokens += getattr(usage, 'cache_creation_input_tokens', 0) or 0
+        self.cache_read_input_tokens += getattr(usage, 'cache_read_input_tokens', 0) or 0
+
     async def _process_tool_calls(self, content: List) -> List[Dict]:
         """Process tool calls from Claude's response."""
         results = []
@@ -369,7 +462,7 @@ Respond with structured JSON as specified in the system prompt.
             entity_id = tool_input["entity_id"]
             hours = tool_input.get("hours", 24)
             start_time = (datetime.now() - timedelta(hours=hours)).isoformat()
-            history = await self.ha_client.get_history(entity_id, start_time)
+            history = await self.ha_client.get_history(entity_id, start_time, minimal=True)
             return history[:100]  # Limit to last 100 entries
 
         elif tool_name == "call_service":
@@ -423,6 +516,7 @@ Respond with structured JSON as specified in the system prompt.
             logger.warning("Failed to parse JSON response, using fallback")
             return {
                 'summary': response_text[:500] if len(response_text) > 500 else response_text,
+                'error': 'Unparseable response',
                 'issues': [],
                 'optimizations': [],
                 'predictions': [],
@@ -441,13 +535,13 @@ Respond with structured JSON as specified in the system prompt.
         """
         prompt = question
         if context:
-            prompt = f"Context:\n{json.dumps(context, indent=2)}\n\nQuestion: {question}"
+            prompt = f"Context:\n{json.dumps(context, separators=(',', ':'))}\n\nQuestion: {question}"
 
         try:
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model=self.model,
                 max_tokens=2048,
-                system=SYSTEM_PROMPT,
+                system=SYSTEM_BLOCKS,
                 messages=[{"role": "user", "content": prompt}]
             )
 
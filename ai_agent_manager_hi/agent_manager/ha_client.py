@@ -3,11 +3,37 @@
 
 import aiohttp
 import asyncio
+import json
 import logging
+import time
 from typing import Optional, Any, Dict, List
 
 logger = logging.getLogger('claude_agent_manager.ha_client')
 
+# orjson encodes/decodes HA payloads (notably the bulk /api/states) several times faster (optional)
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+# Default for every request: socket-level limits, so a hung Home Assistant fails
+# a call within seconds instead of aiohttp's 5 minute total timeout
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=15)
+# History/logbook queries can take a while before the first byte
+HISTORY_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=60)
+
+# State reads circuit breaker: after `failures` consecutive failed reads, skip
+# the network for `cooldown` seconds and serve the last good /api/states snapshot
+READ_BREAKER = {
+    "failures": 3,
+    "cooldown": 60,
+}
+
 
 class HomeAssistantClient:
     """Async client for Home Assistant REST API."""
@@ -24,20 +50,26 @@ class HomeAssistantClient:
         self.session: Optional[aiohttp.ClientSession] = None
         self._connected = False
 
+        # State reads circuit breaker (see READ_BREAKER)
+        self._read_failures = 0
+        self._read_open_until = 0.0
+        self._last_all_states: List[Dict[str, Any]] = []
+
     async def connect(self):
         """Establish connection to Home Assistant."""
         headers = {
             'Authorization': f'Bearer {self.token}',
             'Content-Type': 'application/json'
         }
-        self.session = aiohttp.ClientSession(headers=headers)
+        self.session = aiohttp.ClientSession(headers=headers, json_serialize=_json_dumps,
+                                             timeout=REQUEST_TIMEOUT)
 
         # Test connection
         try:
             async with self.session.get(f'{self.base_url}/api/') as resp:
                 if resp.status == 200:
                     self._connected = True
-                    data = await resp.json()
+                    data = await resp.json(loads=_json_loads)
                     logger.info(f"Connected to Home Assistant: {data.get('message', 'OK')}")
                 else:
                     raise ConnectionError(f"Failed to connect: HTTP {resp.status}")
@@ -56,6 +88,26 @@ class HomeAssistantClient:
         """Check if connected."""
         return self._connected and self.session is not None
 
+    @property
+    def circuit_open(self) -> bool:
+        """True while state reads are skipped after repeated failures."""
+        return time.monotonic() < self._read_open_until
+
+    def _record_read(self, success: bool):
+        """Record a state read outcome, opening the circuit on repeated failures."""
+        if success:
+            if self._read_open_until:
+                logger.info("Home Assistant reads recovered - circuit closed")
+            self._read_failures = 0
+            self._read_open_until = 0.0
+            return
+
+        self._read_failures += 1
+        if self._read_failures >= READ_BREAKER['failures'] and not self.circuit_open:
+            logger.warning(f"Home Assistant reads failed {self._read_failures} times - "
+                           f"using cached states for {READ_BREAKER['cooldown']}s")
+            self._read_open_until = time.monotonic() + READ_BREAKER['cooldown']
+
     async def get_state(self, entity_id: str) -> Optional[str]:
         """Get the state of an entity.
 
@@ -65,15 +117,16 @@ class HomeAssistantClient:
         Returns:
             State value as string, or None if not found
         """
-        if not self.is_connected:
+        if not self.is_connected or self.circuit_open:
             return None
 
         try:
             async with self.session.get(
                 f'{self.base_url}/api/states/{entity_id}'
             ) as resp:
+                self._record_read(resp.status < 500)
                 if resp.status == 200:
-                    data = await resp.json()
+                    data = await resp.json(loads=_json_loads)
                     return data.get('state')
                 elif resp.status == 404:
                     logger.debug(f"Entity not found: {entity_id}")
@@ -82,6 +135,7 @@ class HomeAssistantClient:
                     logger.warning(f"Error getting state for {entity_id}: HTTP {resp.status}")
                     return None
         except Exception as e:
+            self._record_read(False)
             logger.error(f"Error getting state for {entity_id}: {e}")
             return None
 
@@ -94,18 +148,20 @@ class HomeAssistantClient:
         Returns:
             Dictionary of attributes, or None if not found
         """
-        if not self.is_connected:
+        if not self.is_connected or self.circuit_open:
             return None
 
         try:
             async with self.session.get(
                 f'{self.base_url}/api/states/{entity_id}'
             ) as resp:
+                self._record_read(resp.status < 500)
                 if resp.status == 200:
-                    data = await resp.json()
+                    data = await resp.json(loads=_json_loads)
                     return data.get('attributes', {})
                 return None
         except Exception as e:
+            self._record_read(False)
             logger.error(f"Error getting attributes for {entity_id}: {e}")
             return None
 
@@ -118,17 +174,19 @@ class HomeAssistantClient:
         Returns:
             Full state dictionary, or None if not found
         """
-        if not self.is_connected:
+        if not self.is_connected or self.circuit_open:
             return None
 
         try:
             async with self.session.get(
                 f'{self.base_url}/api/states/{entity_id}'
             ) as resp:
+                self._record_read(resp.status < 500)
                 if resp.status == 200:
-                    return await resp.json()
+                    return await resp.json(loads=_json_loads)
                 return None
         except Exception as e:
+            self._record_read(False)
             logger.error(f"Error getting full state for {entity_id}: {e}")
             return None
 
@@ -136,20 +194,47 @@ class HomeAssistantClient:
         """Get all entity states.
 
         Returns:
-            List of all state dictionaries
+            List of all state dictionaries (the last good list while the
+            circuit is open)
         """
         if not self.is_connected:
             return []
+        if self.circuit_open:
+            return self._last_all_states
 
         try:
             async with self.session.get(f'{self.base_url}/api/states') as resp:
+                self._record_read(resp.status < 500)
                 if resp.status == 200:
-                    return await resp.json()
+                    self._last_all_states = await resp.json(loads=_json_loads)
+                    return self._last_all_states
                 return []
         except Exception as e:
+            self._record_read(False)
             logger.error(f"Error getting all states: {e}")
             return []
 
+    async def get_states(self, entity_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Get the full state objects of several entities with one request.
+
+        Args:
+            entity_ids: Entity IDs to look up
+
+        Returns:
+            Dictionary of entity ID to full state dictionary (None if not found)
+        """
+        all_states = await self.get_all_states()
+        if not all_states and self.circuit_open:
+            # Home Assistant is failing - don't fan out per-entity requests at it
+            all_states = self._last_all_states
+        if all_states or self.circuit_open:
+            by_id = {s.get('entity_id'): s for s in all_states}
+            return {entity_id: by_id.get(entity_id) for entity_id in entity_ids}
+
+        # Bulk endpoint failed - fall back to concurrent per-entity requests
+        results = await asyncio.gather(*(self.get_full_state(entity_id) for entity_id in entity_ids))
+        return dict(zip(entity_ids, results))
+
     async def set_state(self, entity_id: str, state: str, attributes: Optional[Dict] = None):
         """Set the state of an entity (for virtual entities).
 
@@ -196,7 +281,7 @@ class HomeAssistantClient:
                 if resp.status != 200:
                     text = await resp.text()
                     raise Exception(f"Service call failed: HTTP {resp.status} - {text}")
-                return await resp.json()
+                return await resp.json(loads=_json_loads)
         except Exception as e:
             logger.error(f"Error calling service {domain}.{service}: {e}")
             raise
@@ -227,7 +312,8 @@ class HomeAssistantClient:
         self,
         entity_id: str,
         start_time: Optional[str] = None,
-        end_time: Optional[str] = None
+        end_time: Optional[str] = None,
+        minimal: bool = False
     ) -> List[Dict[str, Any]]:
         """Get history for an entity.
 
@@ -235,6 +321,8 @@ class HomeAssistantClient:
             entity_id: Entity ID
             start_time: ISO format start time
             end_time: ISO format end time
+            minimal: Only return state and last_changed for each entry, so
+                HA sends (and we decode) far less data
 
         Returns:
             List of historical state changes
@@ -243,15 +331,20 @@ class HomeAssistantClient:
             return []
 
         params = {'filter_entity_id': entity_id}
+        if end_time:
+            params['end_time'] = end_time
+        if minimal:
+            params['minimal_response'] = ''
+            params['no_attributes'] = ''
         url = f'{self.base_url}/api/history/period'
 
         if start_time:
             url = f'{url}/{start_time}'
 
         try:
-            async with self.session.get(url, params=params) as resp:
+            async with self.session.get(url, params=params, timeout=HISTORY_TIMEOUT) as resp:
                 if resp.status == 200:
-                    data = await resp.json()
+                    data = await resp.json(loads=_json_loads)
                     return data[0] if data else []
                 return []
         except Exception as e:
@@ -284,9 +377,9 @@ class HomeAssistantClient:
             url = f'{url}/{start_time}'
 
         try:
-            async with self.session.get(url, params=params) as resp:
+            async with self.session.get(url, params=params, timeout=HISTORY_TIMEOUT) as resp:
                 if resp.status == 200:
-                    return await resp.json()
+                    return await resp.json(loads=_json_loads)
                 return []
         except Exception as e:
             logger.error(f"Error getting logbook: {e}")
@@ -304,7 +397,7 @@ class HomeAssistantClient:
         try:
             async with self.session.get(f'{self.base_url}/api/config') as resp:
                 if resp.status == 200:
-                    return await resp.json()
+                    return await resp.json(loads=_json_loads)
                 return None
         except Exception as e:
             logger.error(f"Error getting config: {e}")
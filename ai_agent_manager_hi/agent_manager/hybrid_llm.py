@@ -12,11 +12,13 @@ Cost savings: 90-95% reduction vs Claude-only approach
 
 import asyncio
 import aiohttp
+import hashlib
 import json
 import logging
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple, Callable
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum
 import time
 
@@ -46,6 +48,79 @@ class AnalysisResult:
     error: Optional[str] = None
 
 
+# Fields that change every cycle without meaning anything - ignored when keying the Claude cache
+VOLATILE_KEYS = frozenset({'timestamp', 'last_changed', 'last_updated', 'last_reported'})
+
+
+def _canonical_state(value: Any) -> Any:
+    """
+    Normalize agent states for cache keying: drop volatile fields and round
+    decimal readings to 0.5 so near-identical states share a key.
+    """
+    if isinstance(value, dict):
+        return {k: _canonical_state(v) for k, v in value.items() if k not in VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_canonical_state(v) for v in value]
+    if isinstance(value, float):
+        return round(value * 2) / 2
+    if isinstance(value, str) and '.' in value:
+        try:
+            return round(float(value) * 2) / 2
+        except ValueError:
+            return value
+    return value
+
+
+def _strip_volatile(value: Any) -> Any:
+    """Drop volatile fields from agent states, keeping every reading exact."""
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k not in VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+def state_fingerprint(agent_states: Dict[str, Any], *extra: Any, rounded: bool = False) -> str:
+    """
+    Hash of the agent states (ignoring volatile fields) plus any extra inputs
+    the analysis depends on, e.g. the hour for time-of-day rules.
+    With rounded=True, decimal readings are rounded as for the Claude cache,
+    so near-identical states share a fingerprint.
+    """
+    states = _canonical_state(agent_states) if rounded else _strip_volatile(agent_states)
+    payload = json.dumps([states, extra],
+                         sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class _TTLCache:
+    """Analysis results by key: LRU-bounded at max_size, expiring after ttl seconds."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()  # key -> (time stored, result)
+
+    def get(self, key: str) -> Optional[AnalysisResult]:
+        """Return an unexpired cached result, refreshing its LRU position."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, key: str, result: AnalysisResult):
+        """Store a result, evicting the least recently used entry when full."""
+        self._entries[key] = (time.monotonic(), result)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
 class RuleBasedAnalyzer:
     """
     TIER 1: Free rule-based analysis.
@@ -634,16 +709,37 @@ class OllamaClient:
         base_url: str = "http://homeassistant.local:11434",
         model: str = "llama3.2:3b",
         timeout: int = 30,
-        max_retries: int = 2
+        max_retries: int = 2,
+        keep_alive: str = "1h"
     ):
         self.base_url = base_url.rstrip('/')
         self.model = model
         self.timeout = timeout
         self.max_retries = max_retries
+        # How long Ollama keeps the model loaded after a request. Ollama's own
+        # default (5m) is shorter than most check intervals, so every cycle
+        # would otherwise reload the model from disk.
+        self.keep_alive = keep_alive
+        self.warmup_ms: Optional[int] = None  # Model load time measured by warmup()
+        # Shared keep-alive session, created on first request (needs a running loop)
+        self._session: Optional[aiohttp.ClientSession] = None
         self.available = False
         self._last_check = None
         self._check_interval = 60  # Recheck availability every 60 seconds
 
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it if needed."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=32, keepalive_timeout=300)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self):
+        """Close the shared session (call at shutdown)."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
     async def check_availability(self) -> bool:
         """Check if Ollama is running and model is available."""
         # Cache availability check
@@ -651,18 +747,18 @@ class OllamaClient:
             return self.available
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/api/tags",
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        models = [m['name'] for m in data.get('models', [])]
-                        self.available = any(self.model in m for m in models)
-                        self._last_check = time.time()
-                        logger.info(f"Ollama available: {self.available}, models: {models}")
-                        return self.available
+            session = await self._get_session()
+            async with session.get(
+                f"{self.base_url}/api/tags",
+                timeout=aiohttp.ClientTimeout(total=5)
+            ) as resp:
+                if resp.status == 200:
+                    data = await resp.json()
+                    models = [m['name'] for m in data.get('models', [])]
+                    self.available = any(self.model in m for m in models)
+                    self._last_check = time.time()
+                    logger.info(f"Ollama available: {self.available}, models: {models}")
+                    return self.available
         except asyncio.TimeoutError:
             logger.warning("Ollama check timed out")
         except aiohttp.ClientError as e:
@@ -674,6 +770,26 @@ class OllamaClient:
         self._last_check = time.time()
         return False
 
+    async def warmup(self) -> bool:
+        """Load the model ahead of the first analysis (a prompt-less generate only loads it)."""
+        start_time = time.time()
+        try:
+            session = await self._get_session()
+            async with session.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.model, "keep_alive": self.keep_alive},
+                timeout=aiohttp.ClientTimeout(total=300)
+            ) as resp:
+                if resp.status == 200:
+                    self.warmup_ms = int((time.time() - start_time) * 1000)
+                    logger.info(f"Ollama model {self.model} loaded in {self.warmup_ms}ms "
+                                f"(keep_alive={self.keep_alive})")
+                    return True
+                logger.warning(f"Ollama warmup returned HTTP {resp.status}")
+        except Exception as e:
+            logger.warning(f"Ollama warmup failed: {e}")
+        return False
+
     async def analyze(
         self,
         agent_states: Dict[str, Any],
@@ -696,28 +812,29 @@ class OllamaClient:
 
         for attempt in range(self.max_retries + 1):
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        f"{self.base_url}/api/generate",
-                        json={
-                            "model": self.model,
-                            "prompt": prompt,
-                            "stream": False,
-                            "options": {
-                                "temperature": 0.3,
-                                "num_predict": 500,
-                                "top_p": 0.9
-                            }
-                        },
-                        timeout=aiohttp.ClientTimeout(total=self.timeout)
-                    ) as resp:
-                        if resp.status == 200:
-                            data = await resp.json()
-                            result = self._parse_response(data)
-                            result.latency_ms = int((time.time() - start_time) * 1000)
-                            return result
-                        else:
-                            last_error = f"HTTP {resp.status}"
+                session = await self._get_session()
+                async with session.post(
+                    f"{self.base_url}/api/generate",
+                    json={
+                        "model": self.model,
+                        "prompt": prompt,
+                        "stream": False,
+                        "keep_alive": self.keep_alive,
+                        "options": {
+                            "temperature": 0.3,
+                            "num_predict": 500,
+                            "top_p": 0.9
+                        }
+                    },
+                    timeout=aiohttp.ClientTimeout(total=self.timeout)
+                ) as resp:
+                    if resp.status == 200:
+                        data = await resp.json()
+                        result = self._parse_response(data)
+                        result.latency_ms = int((time.time() - start_time) * 1000)
+                        return result
+                    else:
+                        last_error = f"HTTP {resp.status}"
 
             except asyncio.TimeoutError:
                 last_error = "Request timed out"
@@ -755,13 +872,14 @@ class OllamaClient:
                                       'idle_count', 'cameras_online', 'solar_excess']}
             }
 
+        now = datetime.now()
         return f"""You are a Home Assistant monitoring agent. Analyze these agent states briefly.
 
-Current time: {datetime.now().strftime('%H:%M')}
-Rate period: {'mid_day ($0.213)' if 9 <= datetime.now().hour < 17 else 'on_peak ($0.587)' if 17 <= datetime.now().hour < 22 else 'off_peak ($0.513)'}
+Current time: {now.strftime('%H:%M')}
+Rate period: {'mid_day ($0.213)' if 9 <= now.hour < 17 else 'on_peak ($0.587)' if 17 <= now.hour < 22 else 'off_peak ($0.513)'}
 
 Agent States:
-{json.dumps(simplified, indent=2)}
+{json.dumps(simplified, separators=(',', ':'))}
 
 {f'Context: {context}' if context else ''}
 
@@ -814,6 +932,48 @@ Set escalate=true ONLY if you see complex multi-agent correlations needing deepe
         )
 
 
+class _JSONObjectScanner:
+    """
+    Finds the first complete top-level JSON object in text that arrives in
+    chunks, tracking brace depth (and string literals) as each chunk lands.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Add a chunk; returns the object's text once its closing brace arrives."""
+        self.text += chunk
+        text = self.text
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = self._depth > 0
+            elif char == '{':
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif char == '}' and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pos = i + 1
+                    return text[self._start:i + 1]
+        self._pos = len(text)
+        return None
+
+
 class ClaudeClient:
     """
     TIER 3: Claude API for complex analysis.
@@ -824,13 +984,23 @@ class ClaudeClient:
         self,
         api_key: str,
         model: str = "claude-3-haiku-20240307",
-        max_retries: int = 2
+        max_retries: int = 2,
+        cache_size: int = 256,
+        cache_ttl: int = 900,
+        max_concurrent: int = 4
     ):
         # Strip whitespace from API key (common copy-paste issue)
         self.api_key = api_key.strip() if api_key else ""
         self.model = model
         self.max_retries = max_retries
 
+        # Response cache - the only place Tier 3 results are cached
+        self._cache = _TTLCache(cache_size, cache_ttl)
+
+        # Async SDK client, created on first use and reused; the semaphore caps concurrent API calls
+        self._client = None
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
         # Pricing per 1M tokens (as of 2024)
         self.pricing = {
             'claude-3-haiku-20240307': {'input': 0.25, 'output': 1.25},
@@ -838,6 +1008,12 @@ class ClaudeClient:
             'claude-3-opus-20240229': {'input': 15.00, 'output': 75.00},
         }
 
+    async def close(self):
+        """Close the SDK client's connection pool (call at shutdown)."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
     async def analyze(
         self,
         agent_states: Dict[str, Any],
@@ -865,28 +1041,65 @@ class ClaudeClient:
                 error="Missing API key"
             )
 
-        prompt = self._build_prompt(agent_states, context, tool_results)
+        key = self._cache_key(agent_states, context, tool_results)
+        cached = self._cache.get(key)
+        if cached is not None:
+            logger.debug("Claude cache hit")
+            return replace(cached, cost=0.0, tokens_used=0,
+                           latency_ms=int((time.time() - start_time) * 1000))
+
+        result = await self._request(
+            anthropic, self._build_prompt(agent_states, context, tool_results), start_time)
+        if not result.error:
+            self._cache.put(key, result)
+        return result
+
+    async def _request(self, anthropic, prompt: str, start_time: float) -> AnalysisResult:
+        """Call the API with retries; errors are returned in the result, not raised."""
         last_error = None
 
+        if self._client is None:
+            self._client = anthropic.AsyncAnthropic(api_key=self.api_key)
+
         for attempt in range(self.max_retries + 1):
             try:
-                client = anthropic.Anthropic(api_key=self.api_key)
-
-                response = client.messages.create(
-                    model=self.model,
-                    max_tokens=1000,
-                    messages=[{"role": "user", "content": prompt}]
-                )
+                async with self._semaphore:
+                    # Stream the reply and parse the JSON as it arrives; once the
+                    # object is complete, stop reading instead of waiting for EOS
+                    parsed = None
+                    scanner = _JSONObjectScanner()
+                    async with self._client.messages.stream(
+                        model=self.model,
+                        max_tokens=1000,
+                        messages=[{"role": "user", "content": prompt}]
+                    ) as stream:
+                        async for chunk in stream.text_stream:
+                            candidate = scanner.feed(chunk)
+                            if candidate is not None:
+                                try:
+                                    parsed = json.loads(candidate)
+                                    break
+                                except json.JSONDecodeError:
+                                    pass
+
+                        if parsed is None:
+                            usage = (await stream.get_final_message()).usage
+                            input_tokens = usage.input_tokens
+                            output_tokens = usage.output_tokens
+                        else:
+                            # Output usage only arrives at the end of the stream,
+                            # so estimate it from the text received (~4 chars/token)
+                            usage = stream.current_message_snapshot.usage
+                            input_tokens = usage.input_tokens
+                            output_tokens = max(usage.output_tokens, len(scanner.text) // 4)
 
                 # Calculate cost
-                input_tokens = response.usage.input_tokens
-                output_tokens = response.usage.output_tokens
                 pricing = self.pricing.get(self.model, {'input': 0.25, 'output': 1.25})
                 cost = (input_tokens * pricing['input'] + output_tokens * pricing['output']) / 1_000_000
 
                 # Parse response
-                text = response.content[0].text
-                parsed = self._parse_response(text)
+                if parsed is None:
+                    parsed = self._parse_response(scanner.text)
 
                 return AnalysisResult(
                     tier=LLMTier.CLAUDE,
@@ -922,6 +1135,15 @@ class ClaudeClient:
             error=last_error
         )
 
+    def _cache_key(self, agent_states: Dict, context: str,
+                   tool_results: Optional[List[Dict]]) -> str:
+        """Hash of the canonicalized request inputs."""
+        payload = json.dumps(
+            {"m": self.model, "s": _canonical_state(agent_states), "c": context, "t": tool_results},
+            sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
     def _build_prompt(
         self,
         states: Dict,
@@ -929,14 +1151,18 @@ class ClaudeClient:
         tool_results: Optional[List[Dict]]
     ) -> str:
         """Build prompt for Claude."""
-        hour = datetime.now().hour
+        now = datetime.now()
+        hour = now.hour
         rate_info = "mid_day ($0.213/kWh)" if 9 <= hour < 17 else \
                    "on_peak ($0.587/kWh - EXPENSIVE)" if 17 <= hour < 22 else \
                    "off_peak ($0.513/kWh)"
 
+        # Compact JSON - indentation whitespace is billed as input tokens
+        tool_json = json.dumps(tool_results, separators=(',', ':')) if tool_results else ''
+
         prompt = f"""You are an expert Home Assistant monitoring agent for a home in Hawaii.
 
-Current time: {datetime.now().strftime('%Y-%m-%d %H:%M')}
+Current time: {now.strftime('%Y-%m-%d %H:%M')}
 TOU Rate: {rate_info}
 
 System has 9 agents monitoring:
@@ -951,10 +1177,10 @@ System has 9 agents monitoring:
 - Bathroom Floors (solar-powered heating)
 
 Agent States:
-{json.dumps(states, indent=2)}
+{json.dumps(states, separators=(',', ':'))}
 
 {f'Additional Context: {context}' if context else ''}
-{f'Tool Results: {json.dumps(tool_results, indent=2)}' if tool_results else ''}
+{f'Tool Results: {tool_json}' if tool_results else ''}
 
 Analyze the system and provide:
 1. Brief summary (1-2 sentences)
@@ -980,6 +1206,43 @@ Respond as JSON:
         return {"summary": text[:500]}
 
 
+class CircuitBreaker:
+    """
+    Stops routing to a failing provider.
+    Opens after failure_threshold consecutive failures and lets one request
+    through again once recovery_timeout seconds have passed.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, recovery_timeout: int = 60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        """True if the provider may be called (circuit closed or recovery period over)."""
+        if self._opened_at is None:
+            return True
+        return time.monotonic() - self._opened_at >= self.recovery_timeout
+
+    def record(self, success: bool):
+        """Record a call outcome, opening or closing the circuit."""
+        if success:
+            if self._opened_at is not None:
+                logger.info(f"{self.name} recovered - circuit closed")
+            self._consecutive_failures = 0
+            self._opened_at = None
+            return
+
+        self._consecutive_failures += 1
+        if self._consecutive_failures >= self.failure_threshold:
+            if self._opened_at is None:
+                logger.warning(f"{self.name} failed {self._consecutive_failures} times - "
+                               f"skipping it for {self.recovery_timeout}s")
+            self._opened_at = time.monotonic()
+
+
 class HybridLLMManager:
     """
     Main hybrid LLM manager that routes between tiers.
@@ -989,6 +1252,9 @@ class HybridLLMManager:
     2. If rules flag for escalation OR low confidence, try local LLM
     3. If local LLM unavailable OR flags for escalation, use Claude
 
+    Each LLM provider sits behind a circuit breaker: one that keeps failing is
+    skipped for a while, and the best lower-tier result is returned instead.
+
     Expected cost savings: 90-95% vs Claude-only
     """
 
@@ -999,13 +1265,23 @@ class HybridLLMManager:
         ollama_model: str = "llama3.2:3b",
         claude_model: str = "claude-3-haiku-20240307",
         escalation_threshold: float = 0.7,
-        enabled: bool = True
+        enabled: bool = True,
+        cache_size: int = 256,
+        cache_ttl: int = 600
     ):
         self.enabled = enabled
         self.rule_analyzer = RuleBasedAnalyzer()
         self.ollama = OllamaClient(base_url=ollama_url, model=ollama_model)
         self.claude = ClaudeClient(api_key=claude_api_key, model=claude_model)
         self.escalation_threshold = escalation_threshold
+        self.ollama_breaker = CircuitBreaker("Ollama")
+        self.claude_breaker = CircuitBreaker("Claude")
+
+        # Tier 2 results for repeated inputs (Tier 3 results are cached by ClaudeClient)
+        self._cache = _TTLCache(cache_size, cache_ttl)
+
+        # Background model load started by initialize()
+        self._warmup_task: Optional[asyncio.Task] = None
 
         # Statistics tracking
         self.stats = {
@@ -1014,13 +1290,24 @@ class HybridLLMManager:
             'claude_count': 0,
             'total_cost': 0.0,
             'total_latency_ms': 0,
-            'errors': 0
+            'errors': 0,
+            'cache_hits': 0
         }
 
+    async def close(self):
+        """Release the Ollama session and Claude client (call at shutdown)."""
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+        await self.ollama.close()
+        await self.claude.close()
+
     async def initialize(self) -> bool:
         """Initialize and check local LLM availability."""
         available = await self.ollama.check_availability()
         if available:
+            # Load the model in the background so the first analysis doesn't pay for it,
+            # without holding up service startup (the load can take minutes)
+            self._warmup_task = asyncio.create_task(self.ollama.warmup())
             logger.info(f"Hybrid LLM initialized - Local: {self.ollama.model}, Claude: {self.claude.model}")
         else:
             logger.warning(f"Local LLM not available - will fallback to Claude for escalations")
@@ -1047,6 +1334,9 @@ class HybridLLMManager:
             # Disabled - just run rules
             return self.rule_analyzer.analyze(agent_states)
 
+        # Best result so far - returned if every higher tier is unavailable
+        fallback: Optional[AnalysisResult] = None
+
         # TIER 1: Rule-based analysis (always runs first unless forced)
         if force_tier is None or force_tier == LLMTier.RULE_BASED:
             result = self.rule_analyzer.analyze(agent_states)
@@ -1061,26 +1351,46 @@ class HybridLLMManager:
             # If forced to rules only, return even with low confidence
             if force_tier == LLMTier.RULE_BASED:
                 return result
-
-        # TIER 2: Local LLM (if available)
+            fallback = result
+
+        # Same inputs analyzed recently - reuse the Tier 2 answer (forced tiers always run)
+        key = None
+        if force_tier is None:
+            key = state_fingerprint(agent_states, context, datetime.now().hour)
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.stats['cache_hits'] += 1
+                logger.debug(f"Cache hit - reusing {cached.tier.name} result")
+                return replace(cached, cost=0.0, tokens_used=0, latency_ms=0)
+
+        # TIER 2: Local LLM (if available and not failing)
         if force_tier is None or force_tier == LLMTier.LOCAL:
-            if self.ollama.available or force_tier == LLMTier.LOCAL:
+            if force_tier == LLMTier.LOCAL or (self.ollama.available and self.ollama_breaker.allow()):
                 result = await self.ollama.analyze(agent_states, context)
                 self.stats['local_count'] += 1
                 self.stats['total_latency_ms'] += result.latency_ms
 
                 if result.error:
                     self.stats['errors'] += 1
+                self.ollama_breaker.record(result.error is None)
 
                 if not result.escalate and result.confidence >= self.escalation_threshold:
                     logger.debug(f"Tier 2 (local) handled - confidence {result.confidence:.2f}, {result.latency_ms}ms")
+                    if key is not None and result.error is None:
+                        self._cache.put(key, result)
                     return result
 
                 # If forced to local only, return even if escalation flagged
                 if force_tier == LLMTier.LOCAL:
                     return result
+                if result.error is None:
+                    fallback = result
 
         # TIER 3: Claude API (fallback)
+        if force_tier is None and fallback is not None and not self.claude_breaker.allow():
+            logger.info("Claude circuit open - returning best lower-tier result")
+            return fallback
+
         result = await self.claude.analyze(agent_states, context)
         self.stats['claude_count'] += 1
         self.stats['total_cost'] += result.cost
@@ -1088,6 +1398,7 @@ class HybridLLMManager:
 
         if result.error:
             self.stats['errors'] += 1
+        self.claude_breaker.record(result.error is None)
 
         logger.info(f"Tier 3 (Claude) handled - cost: ${result.cost:.4f}, {result.latency_ms}ms")
         return result
@@ -1097,11 +1408,12 @@ class HybridLLMManager:
         total = self.stats['rule_based_count'] + self.stats['local_count'] + self.stats['claude_count']
 
         if total == 0:
-            return {**self.stats, 'total_requests': 0}
+            return {**self.stats, 'total_requests': 0, 'ollama_warmup_ms': self.ollama.warmup_ms}
 
         return {
             **self.stats,
             'total_requests': total,
+            'ollama_warmup_ms': self.ollama.warmup_ms,
             'rule_based_pct': round(self.stats['rule_based_count'] / total * 100, 1),
             'local_pct': round(self.stats['local_count'] / total * 100, 1),
             'claude_pct': round(self.stats['claude_count'] / total * 100, 1),
@@ -1118,5 +1430,6 @@ class HybridLLMManager:
             'claude_count': 0,
             'total_cost': 0.0,
             'total_latency_ms': 0,
-            'errors': 0
+            'errors': 0,
+            'cache_hits': 0
         }
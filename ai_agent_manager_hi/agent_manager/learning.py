@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 """Pattern learning and observation storage for Claude Agent Manager."""
 
+import asyncio
 import json
 import logging
 import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from collections import defaultdict
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 
 logger = logging.getLogger('claude_agent_manager.learning')
 
@@ -25,6 +26,10 @@ class Pattern:
     last_seen: str
     metadata: Dict[str, Any]
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Field dict for saving (nested values are shared, not deep-copied like asdict)."""
+        return {name: getattr(self, name) for name in _PATTERN_FIELDS}
+
 
 @dataclass
 class Observation:
@@ -36,6 +41,15 @@ class Observation:
     actions_taken: List[Dict]
     patterns_detected: List[str]
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Field dict for saving (nested values are shared, not deep-copied like asdict)."""
+        return {name: getattr(self, name) for name in _OBSERVATION_FIELDS}
+
+
+# Field names, looked up once instead of reflected on every save
+_PATTERN_FIELDS = tuple(f.name for f in fields(Pattern))
+_OBSERVATION_FIELDS = tuple(f.name for f in fields(Observation))
+
 
 class PatternLearner:
     """Learns and stores patterns from system observations."""
@@ -52,6 +66,9 @@ class PatternLearner:
         self.correlations: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
         self.timing_patterns: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
 
+        # Set when in-memory data differs from the file; save() is a no-op otherwise
+        self._dirty = False
+
         # Ensure storage directory exists
         os.makedirs(os.path.dirname(storage_path), exist_ok=True)
 
@@ -59,8 +76,8 @@ class PatternLearner:
         """Load learning data from storage."""
         if os.path.exists(self.storage_path):
             try:
-                with open(self.storage_path, 'r') as f:
-                    data = json.load(f)
+                # File read + JSON decode run in a worker thread, off the event loop
+                data = await asyncio.to_thread(self._read_file)
 
                 # Load patterns
                 for pid, pdata in data.get('patterns', {}).items():
@@ -90,24 +107,44 @@ class PatternLearner:
             logger.info("No existing learning data found, starting fresh")
 
     async def save(self):
-        """Save learning data to storage."""
+        """Save learning data to storage (skipped if nothing changed since the last save)."""
+        if not self._dirty:
+            return
+
         try:
             data = {
-                'patterns': {pid: asdict(p) for pid, p in self.patterns.items()},
-                'observations': [asdict(o) for o in self.observations[-1000:]],  # Keep last 1000
-                'correlations': dict(self.correlations),
+                'patterns': {pid: p.to_dict() for pid, p in self.patterns.items()},
+                'observations': [o.to_dict() for o in self.observations[-1000:]],  # Keep last 1000
+                'correlations': {k: dict(v) for k, v in self.correlations.items()},
                 'timing_patterns': {str(k): dict(v) for k, v in self.timing_patterns.items()},
                 'last_saved': datetime.now().isoformat()
             }
 
-            with open(self.storage_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            # The snapshot above is taken on the event loop; encoding and disk I/O run in a worker thread
+            await asyncio.to_thread(self._write_file, data)
 
+            self._dirty = False
             logger.debug("Saved learning data")
 
         except Exception as e:
             logger.error(f"Error saving learning data: {e}")
 
+    def _read_file(self) -> Dict[str, Any]:
+        """Read and decode the learning file (blocking - run via asyncio.to_thread)."""
+        with open(self.storage_path, 'r') as f:
+            return json.load(f)
+
+    def _write_file(self, data: Dict[str, Any]):
+        """Write the learning file (blocking - run via asyncio.to_thread).
+
+        Compact JSON goes to a temp file that is atomically swapped in, so a
+        crash mid-write can't leave a truncated learning file behind.
+        """
+        tmp_path = f"{self.storage_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.storage_path)
+
     async def record_observation(
         self,
         agent_states: Dict[str, Any],
@@ -121,10 +158,13 @@ class PatternLearner:
             analysis: Claude's analysis results
             timestamp: Time of observation
         """
+        # Summarized once here and reused by the pattern analysis below
+        summary = self._summarize_states(agent_states)
+
         # Create observation record
         obs = Observation(
             timestamp=timestamp.isoformat(),
-            agent_states=self._summarize_states(agent_states),
+            agent_states=summary,
             analysis_summary=analysis.get('summary', ''),
             issues_count=len(analysis.get('issues', [])),
             actions_taken=[],
@@ -132,6 +172,7 @@ class PatternLearner:
         )
 
         self.observations.append(obs)
+        self._dirty = True
 
         # Update timing patterns
         hour = timestamp.hour
@@ -149,7 +190,7 @@ class PatternLearner:
         await self._detect_correlations(agent_states)
 
         # Analyze for new patterns
-        new_patterns = await self._analyze_patterns(agent_states, analysis, timestamp)
+        new_patterns = await self._analyze_patterns(agent_states, analysis, timestamp, summary)
         obs.patterns_detected = [p.id for p in new_patterns]
 
         # Log observations from Claude
@@ -200,7 +241,8 @@ class PatternLearner:
         self,
         agent_states: Dict[str, Any],
         analysis: Dict[str, Any],
-        timestamp: datetime
+        timestamp: datetime,
+        summary: Optional[Dict[str, str]] = None
     ) -> List[Pattern]:
         """Analyze current state for patterns."""
         new_patterns = []
@@ -243,12 +285,15 @@ class PatternLearner:
         # Pattern: Agent state sequences
         recent_obs = self.observations[-10:]
         if len(recent_obs) >= 3:
+            if summary is None:
+                summary = self._summarize_states(agent_states)
+
             for agent_name in agent_states.keys():
                 if agent_name.startswith('_'):
                     continue
 
                 states = [o.agent_states.get(agent_name, 'unknown') for o in recent_obs]
-                states.append(self._summarize_states(agent_states).get(agent_name, 'unknown'))
+                states.append(summary.get(agent_name, 'unknown'))
 
                 # Look for repeating sequences
                 if len(states) >= 4:
@@ -325,6 +370,12 @@ class PatternLearner:
         hour = datetime.now().hour
         relevant = []
 
+        # Sensors present in the current states (same for every pattern)
+        current_entities = set()
+        for agent_data in agent_states.values():
+            if isinstance(agent_data, dict):
+                current_entities.update(agent_data.get('sensors', {}).keys())
+
         for pattern in self.patterns.values():
             relevance = 0.0
 
@@ -337,11 +388,6 @@ class PatternLearner:
                     relevance += 0.3
 
             # Entity relevance
-            current_entities = set()
-            for agent_data in agent_states.values():
-                if isinstance(agent_data, dict):
-                    current_entities.update(agent_data.get('sensors', {}).keys())
-
             if pattern.entities:
                 overlap = len(set(pattern.entities) & current_entities)
                 relevance += overlap / len(pattern.entities) * 0.3
@@ -370,11 +416,22 @@ class PatternLearner:
             'total_observations': len(self.observations),
             'pattern_categories': self._count_by_category(),
             'high_confidence_patterns': len([p for p in self.patterns.values() if p.confidence > 0.8]),
-            'recent_observations': len([o for o in self.observations
-                                        if datetime.fromisoformat(o.timestamp) >
-                                        datetime.now() - timedelta(hours=24)])
+            'recent_observations': sum(1 for _ in self.iter_recent_observations(hours=24))
         }
 
+    def iter_recent_observations(self, hours: int = 24):
+        """Yield observations from the last `hours`, newest first.
+
+        Observations are appended in time order, so this walks back from the
+        end and stops at the first older one; timestamps are compared as ISO
+        strings (as in prune_old_data) rather than parsed.
+        """
+        cutoff_str = (datetime.now() - timedelta(hours=hours)).isoformat()
+        for obs in reversed(self.observations):
+            if obs.timestamp <= cutoff_str:
+                return
+            yield obs
+
     def _count_by_category(self) -> Dict[str, int]:
         """Count patterns by category."""
         counts = defaultdict(int)
@@ -405,5 +462,6 @@ class PatternLearner:
 
         for pid in patterns_to_remove:
             del self.patterns[pid]
+        self._dirty = True
 
         logger.info(f"Pruned {len(patterns_to_remove)} patterns")
@@ -15,7 +15,7 @@ from typing import Optional
 
 from ha_client import HomeAssistantClient
 from claude_agent import ClaudeAgentManager
-from hybrid_llm import HybridLLMManager, LLMTier
+from hybrid_llm import HybridLLMManager, LLMTier, state_fingerprint
 from learning import PatternLearner
 from config import Config
 from permissions import (
@@ -44,6 +44,9 @@ class AgentManagerService:
         self.permission_manager: Optional[PermissionManager] = None
         self.running = False
         self.last_check = None
+        # State fingerprint of the last cycle that found nothing to do; an identical
+        # next cycle would get the same answer, so its analysis is skipped
+        self._quiet_fingerprint: Optional[str] = None
         self.action_count_this_hour = 0
         self.hour_start = datetime.now().replace(minute=0, second=0, microsecond=0)
 
@@ -63,7 +66,8 @@ class AgentManagerService:
         self.claude_agent = ClaudeAgentManager(
             api_key=self.config.claude_api_key,
             ha_client=self.ha_client,
-            autonomous=self.config.autonomous_actions
+            autonomous=self.config.autonomous_actions,
+            fast_model=self.config.claude_model
         )
         logger.info("Claude Agent initialized")
 
@@ -103,16 +107,22 @@ class AgentManagerService:
         """Run a single check cycle analyzing all agents."""
         logger.info("Starting agent check cycle...")
 
+        # One clock reading per cycle, shared by the state context and the learning record
+        cycle_now = datetime.now()
+
         try:
             # Collect all agent states
-            agent_states = await self.collect_agent_states()
+            agent_states = await self.collect_agent_states(now=cycle_now)
 
-            # Get historical patterns if learning enabled
-            patterns = None
-            if self.learner:
-                patterns = await self.learner.get_relevant_patterns(agent_states)
+            # Same states (and hour, for time-of-day rules) as a quiet cycle - nothing to analyze
+            fingerprint = state_fingerprint(agent_states, cycle_now.hour)
+            if fingerprint == self._quiet_fingerprint:
+                logger.info("No state change since last quiet cycle - skipping analysis")
+                self.last_check = datetime.now()
+                return
 
             # Use hybrid LLM if enabled (90%+ cost savings)
+            analysis = None
             if self.hybrid_llm:
                 hybrid_result = await self.hybrid_llm.analyze(agent_states)
 
@@ -122,40 +132,64 @@ class AgentManagerService:
                            f"cost: ${hybrid_result.cost:.4f})")
 
                 # If hybrid handled it with high confidence, use that result
-                if not hybrid_result.escalate and hybrid_result.confidence >= self.config.escalation_threshold:
+                handled = not hybrid_result.escalate and hybrid_result.confidence >= self.config.escalation_threshold
+
+                # Claude keeps failing - settle for the hybrid result rather than calling it again
+                if not handled and not self.hybrid_llm.claude_breaker.allow():
+                    logger.info("Claude circuit open - using hybrid result instead of escalating")
+                    handled = True
+
+                if handled:
                     analysis = {
                         'summary': hybrid_result.summary,
                         'issues': hybrid_result.issues,
                         'optimizations': [],  # Simple analysis doesn't optimize
                         'predictions': [],
                         'observations': [],
+                        'error': hybrid_result.error,
                         '_tier': hybrid_result.tier.name,
                         '_cost': hybrid_result.cost
                     }
                 else:
-                    # Escalate to full Claude agent for complex analysis
                     logger.info("Escalating to full Claude analysis (tool use enabled)")
-                    analysis = await self.claude_agent.analyze_system(
-                        agent_states=agent_states,
-                        historical_patterns=patterns,
-                        max_actions=self.get_remaining_actions()
-                    )
-                    analysis['_tier'] = 'CLAUDE_FULL'
-                    analysis['_cost'] = hybrid_result.cost  # Include hybrid attempt cost
 
-                # Update stats
-                stats = self.hybrid_llm.get_stats()
-                logger.debug(f"LLM Stats: Rule-based: {stats.get('rule_based_pct', 0):.1f}%, "
-                            f"Local: {stats.get('local_pct', 0):.1f}%, "
-                            f"Claude: {stats.get('claude_pct', 0):.1f}%, "
-                            f"Total cost: ${stats.get('total_cost', 0):.4f}")
-            else:
-                # No hybrid mode - use Claude directly
+                # Stats are only needed for the debug line
+                if logger.isEnabledFor(logging.DEBUG):
+                    stats = self.hybrid_llm.get_stats()
+                    logger.debug(f"LLM Stats: Rule-based: {stats.get('rule_based_pct', 0):.1f}%, "
+                                f"Local: {stats.get('local_pct', 0):.1f}%, "
+                                f"Claude: {stats.get('claude_pct', 0):.1f}%, "
+                                f"Total cost: ${stats.get('total_cost', 0):.4f}")
+
+            if analysis is None:
+                # Full Claude agent (no hybrid mode, or hybrid escalated) - the only
+                # path that uses historical patterns, so they're looked up here
+                patterns = None
+                if self.learner:
+                    patterns = await self.learner.get_relevant_patterns(agent_states)
+
                 analysis = await self.claude_agent.analyze_system(
                     agent_states=agent_states,
                     historical_patterns=patterns,
-                    max_actions=self.get_remaining_actions()
+                    max_actions=self.get_remaining_actions(),
+                    escalated=self.hybrid_llm is not None
                 )
+                if self.hybrid_llm:
+                    self.hybrid_llm.claude_breaker.record(not analysis.get('error'))
+                    analysis['_tier'] = 'CLAUDE_FULL'
+                    analysis['_cost'] = hybrid_result.cost  # Include hybrid attempt cost
+
+                if logger.isEnabledFor(logging.DEBUG):
+                    claude_stats = self.claude_agent.get_stats()
+                    logger.debug(f"Claude Stats: Analysis cache: {claude_stats['analysis_cache_hits']} hits/"
+                                f"{claude_stats['analysis_cache_misses']} misses, "
+                                f"Prompt cache tokens: {claude_stats['cache_read_input_tokens']} read/"
+                                f"{claude_stats['cache_creation_input_tokens']} written")
+
+            # Only a successful analysis with nothing to act on can be reused
+            quiet = not (analysis.get('error') or analysis.get('issues') or
+                         analysis.get('optimizations') or analysis.get('predictions'))
+            self._quiet_fingerprint = fingerprint if quiet else None
 
             # Process recommendations
             if analysis.get('issues'):
@@ -172,7 +206,7 @@ class AgentManagerService:
                 await self.learner.record_observation(
                     agent_states=agent_states,
                     analysis=analysis,
-                    timestamp=datetime.now()
+                    timestamp=cycle_now
                 )
 
             self.last_check = datetime.now()
@@ -187,8 +221,9 @@ class AgentManagerService:
                 level="error"
             )
 
-    async def collect_agent_states(self) -> dict:
+    async def collect_agent_states(self, now: Optional[datetime] = None) -> dict:
         """Collect current state of all monitored agents."""
+        now = now or datetime.now()
         agents = {}
 
         # Define all agents and their key sensors
@@ -252,42 +287,50 @@ class AgentManagerService:
             ]
         }
 
+        # Agent enable switches
+        enabled_entities = {
+            agent_name: f"input_boolean.{agent_name}_agent_enabled" for agent_name in agent_sensors
+        }
+        enabled_entities['light_manager'] = "input_boolean.light_manager_enabled"
+        enabled_entities['selector'] = "input_boolean.agent_selector_enabled"
+
+        # Fetch every entity we need in one request instead of two GETs per sensor
+        wanted = list(enabled_entities.values())
+        for sensors in agent_sensors.values():
+            wanted.extend(sensors)
+        full_states = await self.ha_client.get_states(wanted)
+
         for agent_name, sensors in agent_sensors.items():
             agent_data = {'sensors': {}, 'enabled': True}
 
             # Check if agent is enabled
-            enabled_entity = f"input_boolean.{agent_name}_agent_enabled"
-            if agent_name == 'light_manager':
-                enabled_entity = "input_boolean.light_manager_enabled"
-            elif agent_name == 'selector':
-                enabled_entity = "input_boolean.agent_selector_enabled"
-
-            enabled_state = await self.ha_client.get_state(enabled_entity)
+            enabled_full = full_states.get(enabled_entities[agent_name])
+            enabled_state = enabled_full.get('state') if enabled_full else None
             agent_data['enabled'] = enabled_state == 'on' if enabled_state else True
 
             # Get all sensor states
             for sensor in sensors:
-                state = await self.ha_client.get_state(sensor)
-                attrs = await self.ha_client.get_attributes(sensor)
+                full = full_states.get(sensor)
                 agent_data['sensors'][sensor] = {
-                    'state': state,
-                    'attributes': attrs
+                    'state': full.get('state') if full else None,
+                    'attributes': full.get('attributes', {}) if full else None
                 }
 
             agents[agent_name] = agent_data
 
         # Add system context
         agents['_context'] = {
-            'timestamp': datetime.now().isoformat(),
-            'time_of_day': self.get_time_period(),
-            'tou_rate': self.get_current_tou_rate()
+            'timestamp': now.isoformat(),
+            'time_of_day': self.get_time_period(now.hour),
+            'tou_rate': self.get_current_tou_rate(now.hour)
         }
 
         return agents
 
-    def get_time_period(self) -> str:
+    def get_time_period(self, hour: Optional[int] = None) -> str:
         """Get current time period for context."""
-        hour = datetime.now().hour
+        if hour is None:
+            hour = datetime.now().hour
         if 5 <= hour < 9:
             return 'morning_off_peak'
         elif 9 <= hour < 17:
@@ -297,9 +340,10 @@ class AgentManagerService:
         else:
             return 'night_off_peak'
 
-    def get_current_tou_rate(self) -> dict:
+    def get_current_tou_rate(self, hour: Optional[int] = None) -> dict:
         """Get current TOU electricity rate."""
-        hour = datetime.now().hour
+        if hour is None:
+            hour = datetime.now().hour
         if 9 <= hour < 17:
             return {'rate': 0.213, 'period': 'mid_day', 'is_cheap': True}
         elif 17 <= hour < 22:
@@ -319,7 +363,26 @@ class AgentManagerService:
         return self.config.max_auto_fixes - self.action_count_this_hour
 
     async def handle_issues(self, issues: list):
-        """Handle detected issues with appropriate actions."""
+        """Handle detected issues with appropriate actions.
+
+        Issues are grouped by the entity their action targets: groups run
+        concurrently, while issues acting on the same entity stay in order.
+        """
+        groups = {}
+        for index, issue in enumerate(issues):
+            entity_id = self._action_entity(issue.get('action'))
+            groups.setdefault(entity_id or f"#{index}", []).append(issue)
+
+        results = await asyncio.gather(
+            *(self._handle_issue_group(group) for group in groups.values()),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Failed to handle issue: {result}")
+
+    async def _handle_issue_group(self, issues: list):
+        """Handle issues targeting the same entity, one after another."""
         for issue in issues:
             severity = issue.get('severity', 'info')
             agent = issue.get('agent', 'unknown')
@@ -337,12 +400,27 @@ class AgentManagerService:
                 issue.get('action') and
                 self.get_remaining_actions() > 0):
 
+                # Reserve the slot before awaiting so concurrent groups
+                # can't overrun the hourly limit
+                self.action_count_this_hour += 1
+
                 # Pass agent name for permission checking
-                success = await self.execute_action(issue['action'], agent=agent)
+                success = False
+                try:
+                    success = await self.execute_action(issue['action'], agent=agent)
+                finally:
+                    if not success:
+                        self.action_count_this_hour = max(0, self.action_count_this_hour - 1)
                 if success:
-                    self.action_count_this_hour += 1
                     logger.info(f"[{agent}] Executed autonomous action: {issue['action'].get('type')}")
 
+    @staticmethod
+    def _action_entity(action) -> Optional[str]:
+        """Entity an action targets, or None if it can't be determined."""
+        if not isinstance(action, dict):
+            return None
+        return action.get('entity_id') or (action.get('data') or {}).get('entity_id')
+
     async def handle_optimizations(self, optimizations: list):
         """Handle optimization suggestions."""
         for opt in optimizations:
@@ -559,6 +637,9 @@ class AgentManagerService:
         if self.learner:
             await self.learner.save()
 
+        if self.hybrid_llm:
+            await self.hybrid_llm.close()
+
         if self.ha_client:
             await self.ha_client.disconnect()
 
@@ -19,7 +19,7 @@ SECURITY PRINCIPLE:
 
 import re
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, FrozenSet, List, Optional, Pattern, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
@@ -253,6 +253,25 @@ AGENT_PERMISSIONS: Dict[str, Dict] = {
 }
 
 
+# Services that are never considered safe, even when whitelisted
+DANGEROUS_SERVICES: FrozenSet[str] = frozenset({
+    "homeassistant.restart",
+    "homeassistant.stop",
+    "zwave_js.remove_failed_node",
+    "zwave_js.replace_failed_node",
+    "persistent_notification.dismiss_all",
+})
+
+# Entity prefixes that require human approval ("lock.*", "alarm_*", "siren.*")
+DANGEROUS_ENTITY_PREFIXES: Tuple[str, ...] = ("lock.", "alarm_", "siren.")
+
+
+def _compile_pattern(pattern: str) -> Pattern:
+    """Convert a wildcard permission pattern to an anchored regex."""
+    regex_pattern = pattern.replace(".", r"\.").replace("*", ".*")
+    return re.compile(f"^{regex_pattern}$")
+
+
 class PermissionManager:
     """
     Manages action permissions for all agents.
@@ -277,6 +296,15 @@ class PermissionManager:
         self.action_history: Dict[str, List[float]] = {}  # agent -> [timestamps]
         self.last_action: Dict[str, Dict[str, float]] = {}  # agent -> {action: timestamp}
 
+        # Whitelists are fixed, so split them once: exact "service:entity" keys
+        # become a set lookup, wildcard patterns are compiled a single time
+        self._exact_actions: Dict[str, FrozenSet[str]] = {}
+        self._wildcard_actions: Dict[str, List[Tuple[str, Pattern]]] = {}
+        for agent, config in self.permissions.items():
+            patterns = config.get("allowed_actions", [])
+            self._exact_actions[agent] = frozenset(p for p in patterns if "*" not in p)
+            self._wildcard_actions[agent] = [(p, _compile_pattern(p)) for p in patterns if "*" in p]
+
     def check_permission(
         self,
         agent: str,
@@ -312,7 +340,6 @@ class PermissionManager:
             )
 
         agent_config = self.permissions[agent]
-        allowed_actions = agent_config.get("allowed_actions", [])
         max_per_hour = agent_config.get("max_actions_per_hour", 10)
         cooldown = agent_config.get("cooldown_seconds", 60)
 
@@ -354,19 +381,26 @@ class PermissionManager:
                     entity=entity_id
                 )
 
-        # Check if action matches any allowed pattern
-        for pattern in allowed_actions:
-            if self._matches_pattern(action_key, pattern):
-                # Action is allowed - record it
-                self._record_action(agent, action_key, current_time)
+        # Check if action matches any allowed pattern - exact keys first (O(1)),
+        # then the precompiled wildcards
+        matched = action_key if action_key in self._exact_actions[agent] else None
+        if matched is None:
+            for pattern, regex in self._wildcard_actions[agent]:
+                if regex.match(action_key):
+                    matched = pattern
+                    break
 
-                return PermissionCheck(
-                    result=ActionResult.ALLOWED,
-                    reason=f"Matched pattern: {pattern}",
-                    agent=agent,
-                    action=service,
-                    entity=entity_id
-                )
+        if matched is not None:
+            # Action is allowed - record it
+            self._record_action(agent, action_key, current_time)
+
+            return PermissionCheck(
+                result=ActionResult.ALLOWED,
+                reason=f"Matched pattern: {matched}",
+                agent=agent,
+                action=service,
+                entity=entity_id
+            )
 
         # No match found - denied
         return PermissionCheck(
@@ -386,11 +420,7 @@ class PermissionManager:
             "switch.turn_off:switch.pool_valve_1" matches "switch.turn_off:switch.pool_valve_*"
             "light.turn_on:light.kitchen_main" matches "*:light.*"
         """
-        # Convert wildcard pattern to regex
-        regex_pattern = pattern.replace(".", r"\.").replace("*", ".*")
-        regex_pattern = f"^{regex_pattern}$"
-
-        return bool(re.match(regex_pattern, action_key))
+        return bool(_compile_pattern(pattern).match(action_key))
 
     def _record_action(self, agent: str, action_key: str, timestamp: float):
         """Record that an action was executed."""
@@ -437,29 +467,13 @@ class PermissionManager:
         Quick check if an action is generally considered safe.
         Used as a secondary check even for allowed actions.
         """
-        # Dangerous service patterns
-        dangerous_services = [
-            "homeassistant.restart",
-            "homeassistant.stop",
-            "zwave_js.remove_failed_node",
-            "zwave_js.replace_failed_node",
-            "persistent_notification.dismiss_all",
-        ]
-
-        if service in dangerous_services:
+        if service in DANGEROUS_SERVICES:
             return False, f"Service {service} is in dangerous list"
 
-        # Dangerous entity patterns
-        dangerous_entities = [
-            "lock.*",       # Locks require human approval
-            "alarm_*",      # Alarms require human approval
-            "siren.*",      # Sirens require human approval
-        ]
-
-        for pattern in dangerous_entities:
-            regex = pattern.replace(".", r"\.").replace("*", ".*")
-            if re.match(f"^{regex}$", entity_id):
-                return False, f"Entity {entity_id} matches dangerous pattern {pattern}"
+        # Locks, alarms and sirens require human approval
+        if entity_id.startswith(DANGEROUS_ENTITY_PREFIXES):
+            prefix = next(p for p in DANGEROUS_ENTITY_PREFIXES if entity_id.startswith(p))
+            return False, f"Entity {entity_id} matches dangerous pattern {prefix}*"
 
         return True, "Action appears safe"
 
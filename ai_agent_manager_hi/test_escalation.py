@@ -144,6 +144,8 @@ async def test_escalation():
     print(f"Avg latency: {stats.get('avg_latency_ms', 0):.0f}ms")
     print(f"Error rate: {stats.get('error_rate_pct', 0):.1f}%")
 
+    await manager.close()
+
     print("\n" + "=" * 70)
     print("TEST COMPLETE")
     print("=" * 70)
@@ -47,14 +47,13 @@ class BaseAgent(ABC):
         """Return the rule definitions for this agent"""
         pass
 
+    def is_due(self) -> bool:
+        """Whether the manager should run check() this cycle (agents may throttle themselves)"""
+        return True
+
     async def get_states(self, entities: List[str]) -> Dict[str, Any]:
         """Fetch current states for a list of entities"""
-        states = {}
-        for entity_id in entities:
-            state = await self.ha_client.get_state(entity_id)
-            if state:
-                states[entity_id] = state.get('state', 'unknown')
-        return states
+        return await self.ha_client.get_states(entities)
 
     async def get_recent_events(self, hours: int = 1) -> List[Dict[str, Any]]:
         """Get recent events for monitored entities (placeholder)"""
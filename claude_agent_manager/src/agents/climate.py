@@ -9,6 +9,9 @@ from .base import BaseAgent, AgentCheck
 
 logger = logging.getLogger(__name__)
 
+# Sensor readings that carry no value
+_NO_READING = frozenset(('unavailable', 'unknown'))
+
 
 class ClimateAgent(BaseAgent):
     """Monitors indoor climate/HVAC systems"""
@@ -31,6 +34,10 @@ class ClimateAgent(BaseAgent):
             "sensor.indoor_humidity",
         ]
 
+        # HVAC availability check targets, picked out once instead of prefix-scanning each check
+        self._hvac_entities = tuple(e for e in self.monitored_entities if e.startswith('climate.'))
+        self._msg_hvac_offline = {e: f"hvac_offline: {e} is unavailable" for e in self._hvac_entities}
+
     async def get_monitored_entities(self) -> List[str]:
         return self.monitored_entities
 
@@ -41,7 +48,7 @@ class ClimateAgent(BaseAgent):
 
         # Check indoor temperature range (68-76°F comfortable)
         indoor_temp = states.get('sensor.indoor_temperature')
-        if indoor_temp and indoor_temp not in ['unavailable', 'unknown']:
+        if indoor_temp and indoor_temp not in _NO_READING:
             try:
                 temp_f = float(indoor_temp)
                 if temp_f < 65:
@@ -52,14 +59,13 @@ class ClimateAgent(BaseAgent):
                 pass
 
         # Check HVAC systems availability
-        for entity_id, state in states.items():
-            if entity_id.startswith('climate.'):
-                if state == 'unavailable':
-                    issues.append(f"hvac_offline: {entity_id} is unavailable")
+        for entity_id in self._hvac_entities:
+            if states.get(entity_id) == 'unavailable':
+                issues.append(self._msg_hvac_offline[entity_id])
 
         # Check for high humidity (desert climate, indoor humidity should be low)
         humidity = states.get('sensor.indoor_humidity')
-        if humidity and humidity not in ['unavailable', 'unknown']:
+        if humidity and humidity not in _NO_READING:
             try:
                 humidity_pct = float(humidity)
                 if humidity_pct > 60:
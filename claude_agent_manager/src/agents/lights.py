@@ -31,6 +31,10 @@ class LightsAgent(BaseAgent):
             "sun.sun",
         ]
 
+        # Lights covered by the late-night check, picked out once instead of prefix-scanning each check
+        self._light_entities = tuple(e for e in self.monitored_entities if e.startswith('light.'))
+        self._msg_late_night = {e: f"late_night_lights: {e} still on after 2 AM" for e in self._light_entities}
+
     async def get_monitored_entities(self) -> List[str]:
         return self.monitored_entities
 
@@ -49,9 +53,9 @@ class LightsAgent(BaseAgent):
 
         # Check all lights after 2 AM (should be off)
         if 2 <= current_hour < 6:
-            for entity_id, state in states.items():
-                if entity_id.startswith('light.') and state == 'on':
-                    issues.append(f"late_night_lights: {entity_id} still on after 2 AM")
+            for entity_id in self._light_entities:
+                if states.get(entity_id) == 'on':
+                    issues.append(self._msg_late_night[entity_id])
 
         # Check pool/hot tub lights during day (waste of energy)
         pool_light = states.get('switch.light_pool_zwave')
@@ -3,111 +3,131 @@ Pool Agent - Monitors pool/hot tub system
 Version 1.0.5 - Added startup sequence monitoring
 """
 
+import sys
 import logging
-from datetime import datetime
+import math
+import operator
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 from .base import BaseAgent, AgentCheck
 
 logger = logging.getLogger(__name__)
 
+_intern = sys.intern
+
+# States that mean "no usable reading" (None = entity missing from the fetch)
+_MISSING_STATES = frozenset({'unavailable', 'unknown', None})
+
+
+# Entity IDs read directly by the checks. Interned once at import so lookups
+# against the (interned) state keys compare by identity.
+E_TEMP = _intern("sensor.pool_heater_wifi_temperature")
+E_SENSOR_FAILURE = _intern("input_boolean.pool_sensor_failure_detected")
+E_PUMP = _intern("switch.pool_pump_zwave")
+E_HOT_TUB_HEAT = _intern("input_boolean.hot_tub_heat")
+E_POOL_HEAT = _intern("input_boolean.pool_heat")
+E_POOL_SKIMMER = _intern("input_boolean.pool_skimmer")
+E_POOL_WATERFALL = _intern("input_boolean.pool_waterfall")
+E_POOL_VACUUM = _intern("input_boolean.pool_vacuum")
+E_HOT_TUB_EMPTY = _intern("input_boolean.hot_tub_empty")
+E_SEQ_LOCK = _intern("input_boolean.pool_sequence_lock")
+E_POOL_ACTION = _intern("input_boolean.pool_action")
+E_POWER_24VAC = _intern("switch.pool_valve_power_24vac_zwave")
+E_SPA_SUCTION_TRACKER = _intern("input_boolean.pool_valve_spa_suction_position_tracker")
+E_SPA_RETURN_TRACKER = _intern("input_boolean.pool_valve_spa_return_position_tracker")
+E_POOL_SUCTION_TRACKER = _intern("input_boolean.pool_valve_pool_suction_position_tracker")
+E_POOL_RETURN_TRACKER = _intern("input_boolean.pool_valve_pool_return_position_tracker")
+
 
 # Expected states for each pool program
 # Format: { entity_id: expected_state }
+def _valve_trackers(spa_suction: str, pool_suction: str, spa_return: str,
+                    pool_return: str, skimmer: str) -> Dict[str, str]:
+    """Expected valve position trackers for a mode (vacuum tracker comes from _BASE_OFF)"""
+    return {
+        "input_boolean.pool_valve_spa_suction_position_tracker": spa_suction,
+        "input_boolean.pool_valve_pool_suction_position_tracker": pool_suction,
+        "input_boolean.pool_valve_spa_return_position_tracker": spa_return,
+        "input_boolean.pool_valve_pool_return_position_tracker": pool_return,
+        "input_boolean.pool_valve_skimmer_position_tracker": skimmer,
+    }
+
+
+# Shared by every running mode: vacuum tracker off, and the sequence lock and
+# action flag OFF once startup completes (line 3610-3612)
+_BASE_OFF = {
+    "input_boolean.pool_valve_vacuum_position_tracker": "off",
+    "input_boolean.pool_sequence_lock": "off",
+    "input_boolean.pool_action": "off",
+}
+_HEATER_ON = {
+    "switch.pool_heater_wifi": "on",
+    "climate.pool_heater_wifi": "heat",
+}
+_HEATER_OFF = {
+    "switch.pool_heater_wifi": "off",
+    "climate.pool_heater_wifi": "off",
+}
+_PUMP_ON = {"switch.pool_pump_zwave": "on"}
+_VALVE_POWER_OFF = {"switch.pool_valve_power_24vac_zwave": "off"}
+
 PROGRAM_EXPECTED_STATES = {
     "hot_tub_heat": {
         "input_boolean.hot_tub_heat": "on",
-        "switch.pool_pump_zwave": "on",
-        "switch.pool_heater_wifi": "on",
-        "climate.pool_heater_wifi": "heat",
+        **_PUMP_ON,
+        **_HEATER_ON,
         # climate temp: 102 (checked separately)
         # Valve trackers for spa heating: spa ON, pool OFF, skimmer OFF (per automation line 3343)
-        "input_boolean.pool_valve_spa_suction_position_tracker": "on",
-        "input_boolean.pool_valve_pool_suction_position_tracker": "off",
-        "input_boolean.pool_valve_spa_return_position_tracker": "on",
-        "input_boolean.pool_valve_pool_return_position_tracker": "off",
-        "input_boolean.pool_valve_skimmer_position_tracker": "off",  # OFF for hot tub heat
-        "input_boolean.pool_valve_vacuum_position_tracker": "off",
-        "input_boolean.pool_sequence_lock": "off",
-        "input_boolean.pool_action": "off",  # OFF after startup completes (line 3610-3612)
-        "switch.pool_valve_power_24vac_zwave": "off",
+        **_valve_trackers("on", "off", "on", "off", "off"),
+        **_BASE_OFF,
+        **_VALVE_POWER_OFF,
     },
     "pool_heat": {
         "input_boolean.pool_heat": "on",
         "input_boolean.pool_heat_allow": "on",
-        "switch.pool_pump_zwave": "on",
-        "switch.pool_heater_wifi": "on",
-        "climate.pool_heater_wifi": "heat",
+        **_PUMP_ON,
+        **_HEATER_ON,
         # climate temp: 81 (checked separately)
         # Valve trackers for pool heating: pool ON, spa OFF, skimmer ON (per automation line 5180)
-        "input_boolean.pool_valve_spa_suction_position_tracker": "off",
-        "input_boolean.pool_valve_pool_suction_position_tracker": "on",
-        "input_boolean.pool_valve_spa_return_position_tracker": "off",
-        "input_boolean.pool_valve_pool_return_position_tracker": "on",
-        "input_boolean.pool_valve_skimmer_position_tracker": "on",
-        "input_boolean.pool_valve_vacuum_position_tracker": "off",
-        "input_boolean.pool_sequence_lock": "off",
-        "input_boolean.pool_action": "off",  # OFF after startup completes
-        "switch.pool_valve_power_24vac_zwave": "off",
+        **_valve_trackers("off", "on", "off", "on", "on"),
+        **_BASE_OFF,
+        **_VALVE_POWER_OFF,
     },
     "pool_skimmer": {
         "input_boolean.pool_skimmer": "on",
-        "switch.pool_pump_zwave": "on",
-        "switch.pool_heater_wifi": "off",
-        "climate.pool_heater_wifi": "off",
+        **_PUMP_ON,
+        **_HEATER_OFF,
         # Valve trackers for skimmer: pool ON, spa OFF, skimmer ON, vacuum OFF
-        "input_boolean.pool_valve_spa_suction_position_tracker": "off",
-        "input_boolean.pool_valve_pool_suction_position_tracker": "on",
-        "input_boolean.pool_valve_spa_return_position_tracker": "off",
-        "input_boolean.pool_valve_pool_return_position_tracker": "on",
-        "input_boolean.pool_valve_skimmer_position_tracker": "on",
-        "input_boolean.pool_valve_vacuum_position_tracker": "off",
-        "input_boolean.pool_sequence_lock": "off",
-        "input_boolean.pool_action": "off",  # OFF after startup completes
+        **_valve_trackers("off", "on", "off", "on", "on"),
+        **_BASE_OFF,
     },
     "pool_waterfall": {
         "input_boolean.pool_waterfall": "on",
-        "switch.pool_pump_zwave": "on",
-        "switch.pool_heater_wifi": "off",
-        "climate.pool_heater_wifi": "off",
+        **_PUMP_ON,
+        **_HEATER_OFF,
         # Valve trackers for waterfall: pool suction ON, spa return ON (for waterfall), skimmer ON
-        "input_boolean.pool_valve_spa_suction_position_tracker": "off",
-        "input_boolean.pool_valve_pool_suction_position_tracker": "on",
-        "input_boolean.pool_valve_spa_return_position_tracker": "on",
-        "input_boolean.pool_valve_pool_return_position_tracker": "off",
-        "input_boolean.pool_valve_skimmer_position_tracker": "on",
-        "input_boolean.pool_valve_vacuum_position_tracker": "off",
-        "input_boolean.pool_sequence_lock": "off",
-        "input_boolean.pool_action": "off",  # OFF after startup completes
+        **_valve_trackers("off", "on", "on", "off", "on"),
+        **_BASE_OFF,
     },
     "pool_vacuum": {
         "input_boolean.pool_vacuum": "on",
-        "switch.pool_pump_zwave": "on",
-        "switch.pool_heater_wifi": "off",
-        "climate.pool_heater_wifi": "off",
+        **_PUMP_ON,
+        **_HEATER_OFF,
         # Valve trackers for vacuum: pool ON, spa OFF, skimmer OFF (vacuum ON)
-        "input_boolean.pool_valve_spa_suction_position_tracker": "off",
-        "input_boolean.pool_valve_pool_suction_position_tracker": "on",
-        "input_boolean.pool_valve_spa_return_position_tracker": "off",
-        "input_boolean.pool_valve_pool_return_position_tracker": "on",
-        "input_boolean.pool_valve_skimmer_position_tracker": "off",
+        **_valve_trackers("off", "on", "off", "on", "off"),
+        **_BASE_OFF,
         "input_boolean.pool_valve_vacuum_position_tracker": "on",
-        "input_boolean.pool_sequence_lock": "off",
-        "input_boolean.pool_action": "off",  # OFF after startup completes
     },
     "hot_tub_empty": {
         "input_boolean.hot_tub_empty": "on",
-        "switch.pool_pump_zwave": "on",
-        "switch.pool_heater_wifi": "off",
-        "climate.pool_heater_wifi": "off",
+        **_PUMP_ON,
+        **_HEATER_OFF,
         # Valve trackers for hot tub empty: spa suction ON, pool return ON (drains spa to pool)
-        "input_boolean.pool_valve_spa_suction_position_tracker": "on",
-        "input_boolean.pool_valve_pool_suction_position_tracker": "off",
-        "input_boolean.pool_valve_spa_return_position_tracker": "off",
-        "input_boolean.pool_valve_pool_return_position_tracker": "on",
-        "input_boolean.pool_valve_skimmer_position_tracker": "on",
-        "input_boolean.pool_valve_vacuum_position_tracker": "off",
-        "input_boolean.pool_sequence_lock": "off",
-        "input_boolean.pool_action": "off",  # OFF after startup completes
+        **_valve_trackers("on", "off", "off", "on", "on"),
+        **_BASE_OFF,
         # Max runtime: 6 minutes (checked separately)
     },
     "no_mode": {
@@ -118,12 +138,38 @@ PROGRAM_EXPECTED_STATES = {
         "input_boolean.pool_vacuum": "off",
         "input_boolean.hot_tub_empty": "off",
         "switch.pool_pump_zwave": "off",
-        "switch.pool_heater_wifi": "off",
-        "climate.pool_heater_wifi": "off",
+        **_HEATER_OFF,
         "input_boolean.pool_sequence_lock": "off",
         "input_boolean.pool_action": "off",
     },
 }
+PROGRAM_EXPECTED_STATES = {
+    mode: {_intern(entity): _intern(state) for entity, state in expected.items()}
+    for mode, expected in PROGRAM_EXPECTED_STATES.items()
+}
+
+# Entities whose "no_mode" mismatch is reported (heater and action flags)
+_CRITICAL_NO_MODE_ENTITIES = frozenset({
+    "switch.pool_heater_wifi",
+    "climate.pool_heater_wifi",
+    "input_boolean.pool_action",
+    "input_boolean.pool_sequence_lock",
+})
+
+
+def _format_mismatches(mismatches: List[Tuple[str, str, str]]) -> str:
+    """Render (entity, expected, actual) tuples for an issue message"""
+    return '; '.join(f"{entity}: expected '{expected}', got '{actual}'" for entity, expected, actual in mismatches)
+
+
+# Valve trackers that must not be 'off' while a heating mode is on
+# Format: (mode_entity, trackers, issue message)
+_HEATING_INVARIANTS = (
+    (E_HOT_TUB_HEAT, (E_SPA_SUCTION_TRACKER, E_SPA_RETURN_TRACKER),
+     "CRITICAL: Hot tub heat ON but valve trackers show WRONG position (drainage risk)"),
+    (E_POOL_HEAT, (E_POOL_SUCTION_TRACKER, E_POOL_RETURN_TRACKER),
+     "WARNING: Pool heat ON but valve trackers may be wrong"),
+)
 
 # Climate temperature targets per mode
 CLIMATE_TEMP_TARGETS = {
@@ -131,10 +177,22 @@ CLIMATE_TEMP_TARGETS = {
     "pool_heat": 81,
 }
 
+# Temperature bands, looked up with bisect_left on the band edges:
+# < 40 very low | 40-103 normal | >103-105 high | > 105 overheat
+# (the lower edge is the float just below 40 so exactly 40.0 is still normal)
+_TEMP_BAND_EDGES = (math.nextafter(40, -math.inf), 103, 105)
+_TEMP_BAND_MESSAGES = (
+    "WARNING: Temperature very low ({t}°F) - possible sensor issue",
+    None,
+    "WARNING: Temperature high ({t}°F)",
+    "CRITICAL: Overheat detected ({t}°F)",
+)
+
 # Mode timeout limits (in minutes)
 MODE_TIMEOUT_MINUTES = {
     "hot_tub_empty": 6,
 }
+_MODE_TIMEOUT_DELTAS = {mode: timedelta(minutes=n) for mode, n in MODE_TIMEOUT_MINUTES.items()}
 
 # Startup sequence timing limits (in seconds)
 STARTUP_TIMING = {
@@ -144,7 +202,7 @@ STARTUP_TIMING = {
 }
 
 # Valve switches that should be OFF during steady-state operation
-VALVE_SWITCHES = [
+VALVE_SWITCHES = [_intern(v) for v in [
     "switch.pool_valve_power_24vac_zwave",
     "switch.pool_valve_spa_suction_zwave",
     "switch.pool_valve_spa_return_zwave",
@@ -152,403 +210,464 @@ VALVE_SWITCHES = [
     "switch.pool_valve_pool_return_zwave",
     "switch.pool_valve_skimmer_zwave",
     "switch.pool_valve_vacuum_zwave",
-]
+]]
 
+# Friendly valve names for log/issue messages (e.g. "pool_valve_spa_suction")
+_VALVE_NAMES = {v: v.split('.')[-1].replace('_zwave', '') for v in VALVE_SWITCHES}
 
-class PoolAgent(BaseAgent):
-    """Monitors pool and hot tub systems with auto-fix capabilities"""
+# Per-valve startup state is kept in lists indexed by position in VALVE_SWITCHES
+_VALVE_COUNT = len(VALVE_SWITCHES)
+_VALVE_NAME_LIST = [_VALVE_NAMES[v] for v in VALVE_SWITCHES]
+_valve_getter = operator.itemgetter(*VALVE_SWITCHES)
 
-    def __init__(self, ha_client):
-        super().__init__("pool", ha_client)
 
-        # All monitored pool entities
-        self.monitored_entities = [
-            # Temperature
-            "sensor.pool_heater_wifi_temperature",
-            "sensor.pool_water_temperature_reliable",
-
-            # Pump
-            "switch.pool_pump_zwave",
-
-            # Heater
-            "switch.pool_heater_wifi",
-            "climate.pool_heater_wifi",
-
-            # Mode toggles
-            "input_boolean.hot_tub_heat",
-            "input_boolean.pool_heat",
-            "input_boolean.pool_heat_allow",
-            "input_boolean.pool_skimmer",
-            "input_boolean.pool_waterfall",
-            "input_boolean.pool_vacuum",
-            "input_boolean.hot_tub_empty",
-
-            # System flags
-            "input_boolean.pool_action",
-            "input_boolean.pool_sequence_lock",
-            "input_boolean.pool_sensor_failure_detected",
-
-            # Valves (Z-Wave)
-            "switch.pool_valve_power_24vac_zwave",
-            "switch.pool_valve_spa_suction_zwave",
-            "switch.pool_valve_spa_return_zwave",
-            "switch.pool_valve_pool_suction_zwave",
-            "switch.pool_valve_pool_return_zwave",
-            "switch.pool_valve_skimmer_zwave",
-            "switch.pool_valve_vacuum_zwave",
-
-            # Valve position trackers
-            "input_boolean.pool_valve_spa_suction_position_tracker",
-            "input_boolean.pool_valve_spa_return_position_tracker",
-            "input_boolean.pool_valve_pool_suction_position_tracker",
-            "input_boolean.pool_valve_pool_return_position_tracker",
-            "input_boolean.pool_valve_skimmer_position_tracker",
-            "input_boolean.pool_valve_vacuum_position_tracker",
-
-            # Lights
-            "switch.light_pool_zwave",
-            "switch.light_hot_tub_zwave",
-
-            # Bubbler
-            "switch.pool_hot_tub_bubbler_zwave",
-        ]
+# All monitored pool entities (ordered for fetching)
+_MONITORED_ENTITIES_TUPLE: Tuple[str, ...] = tuple(_intern(e) for e in (
+    # Temperature
+    "sensor.pool_heater_wifi_temperature",
+    "sensor.pool_water_temperature_reliable",
 
-        # Z-Wave valve entities for availability checks
-        self.zwave_valves = [
-            'switch.pool_valve_power_24vac_zwave',
-            'switch.pool_valve_spa_suction_zwave',
-            'switch.pool_valve_spa_return_zwave',
-            'switch.pool_valve_pool_suction_zwave',
-            'switch.pool_valve_pool_return_zwave',
-            'switch.pool_valve_skimmer_zwave',
-            'switch.pool_valve_vacuum_zwave'
-        ]
+    # Pump
+    "switch.pool_pump_zwave",
 
-        # Track mode start times for timeout detection
-        self.mode_start_times: Dict[str, datetime] = {}
+    # Heater
+    "switch.pool_heater_wifi",
+    "climate.pool_heater_wifi",
 
-        # Track startup sequence state
-        self.startup_tracking: Dict[str, Any] = {
-            "sequence_lock_start": None,      # When sequence_lock turned ON
-            "24vac_on_start": None,           # When 24VAC turned ON
-            "valve_switch_on_times": {},      # When each valve switch turned ON
-            "last_sequence_lock_state": None, # Previous sequence_lock state
-            "last_24vac_state": None,         # Previous 24VAC state
-            "last_valve_states": {},          # Previous valve switch states
-        }
+    # Mode toggles
+    "input_boolean.hot_tub_heat",
+    "input_boolean.pool_heat",
+    "input_boolean.pool_heat_allow",
+    "input_boolean.pool_skimmer",
+    "input_boolean.pool_waterfall",
+    "input_boolean.pool_vacuum",
+    "input_boolean.hot_tub_empty",
 
-    async def get_monitored_entities(self) -> List[str]:
-        return self.monitored_entities
-
-    def _get_active_mode(self, states: Dict[str, Any]) -> Optional[str]:
-        """Determine which mode is currently active, if any"""
-        mode_entities = {
-            "hot_tub_heat": "input_boolean.hot_tub_heat",
-            "pool_heat": "input_boolean.pool_heat",
-            "pool_skimmer": "input_boolean.pool_skimmer",
-            "pool_waterfall": "input_boolean.pool_waterfall",
-            "pool_vacuum": "input_boolean.pool_vacuum",
-            "hot_tub_empty": "input_boolean.hot_tub_empty",
-        }
+    # System flags
+    "input_boolean.pool_action",
+    "input_boolean.pool_sequence_lock",
+    "input_boolean.pool_sensor_failure_detected",
 
-        for mode, entity in mode_entities.items():
-            if states.get(entity) == 'on':
-                return mode
+    # Valves (Z-Wave)
+    "switch.pool_valve_power_24vac_zwave",
+    "switch.pool_valve_spa_suction_zwave",
+    "switch.pool_valve_spa_return_zwave",
+    "switch.pool_valve_pool_suction_zwave",
+    "switch.pool_valve_pool_return_zwave",
+    "switch.pool_valve_skimmer_zwave",
+    "switch.pool_valve_vacuum_zwave",
 
+    # Valve position trackers
+    "input_boolean.pool_valve_spa_suction_position_tracker",
+    "input_boolean.pool_valve_spa_return_position_tracker",
+    "input_boolean.pool_valve_pool_suction_position_tracker",
+    "input_boolean.pool_valve_pool_return_position_tracker",
+    "input_boolean.pool_valve_skimmer_position_tracker",
+    "input_boolean.pool_valve_vacuum_position_tracker",
+
+    # Lights
+    "switch.light_pool_zwave",
+    "switch.light_hot_tub_zwave",
+
+    # Bubbler
+    "switch.pool_hot_tub_bubbler_zwave",
+))
+_MONITORED_ENTITIES_SET = frozenset(_MONITORED_ENTITIES_TUPLE)
+assert _MONITORED_ENTITIES_SET.issuperset(VALVE_SWITCHES), "every valve switch must be monitored"
+
+
+@dataclass(slots=True)
+class _StartupTracking:
+    """Startup sequence state carried between checks"""
+    sequence_lock_start: Optional[datetime] = None        # When sequence_lock turned ON
+    power24_on_start: Optional[datetime] = None           # When 24VAC turned ON
+    last_sequence_lock_state: Optional[str] = None        # Previous sequence_lock state
+    last_24vac_state: Optional[str] = None                # Previous 24VAC state
+    # Indexed like VALVE_SWITCHES (slot 0, the 24VAC switch, is tracked by the fields above)
+    valve_start_times: List[Optional[float]] = field(
+        default_factory=lambda: [None] * _VALVE_COUNT)     # time.monotonic() when each valve switch turned ON
+    last_valve_states: List[Optional[str]] = field(
+        default_factory=lambda: [None] * _VALVE_COUNT)     # Previous valve switch states
+
+
+# Z-Wave valve entities for availability checks
+_ZWAVE_VALVES: Tuple[str, ...] = tuple(VALVE_SWITCHES)
+
+# Mode toggles in priority order (first one 'on' is the active mode)
+_MODE_ENTITIES: Tuple[Tuple[str, str], ...] = (
+    ("hot_tub_heat", E_HOT_TUB_HEAT),
+    ("pool_heat", E_POOL_HEAT),
+    ("pool_skimmer", E_POOL_SKIMMER),
+    ("pool_waterfall", E_POOL_WATERFALL),
+    ("pool_vacuum", E_POOL_VACUUM),
+    ("hot_tub_empty", E_HOT_TUB_EMPTY),
+)
+_MODE_ENTITY_TUPLE: Tuple[str, ...] = tuple(entity for _, entity in _MODE_ENTITIES)
+
+
+class _StateMap(dict):
+    """State snapshot where a missing entity reads as None (like dict.get) under subscription"""
+    __slots__ = ()
+
+    def __missing__(self, key):
         return None
 
-    def _validate_program(self, mode: str, states: Dict[str, Any]) -> List[str]:
-        """Validate that current states match expected states for the active mode"""
-        mismatches = []
 
-        if mode not in PROGRAM_EXPECTED_STATES:
-            return mismatches
+# Entities _analyze reads directly, fetched in one C-level itemgetter call
+_CHECK_KEYS: Tuple[str, ...] = (
+    E_SENSOR_FAILURE,
+    E_TEMP,
+    E_HOT_TUB_HEAT,
+    E_POOL_HEAT,
+    E_PUMP,
+    E_SEQ_LOCK,
+    E_POOL_ACTION,
+    E_POOL_SKIMMER,
+    E_POOL_WATERFALL,
+)
+_check_getter = operator.itemgetter(*_CHECK_KEYS)
+
+
+# ========== ANALYSIS ==========
+# Pure functions over a state snapshot. Everything carried between checks is
+# passed in explicitly, so nothing here touches the agent or Home Assistant.
+
+def _get_active_mode(states: Dict[str, Optional[str]]) -> Optional[str]:
+    """Determine which mode is currently active, if any"""
+    for mode, entity in _MODE_ENTITIES:
+        if states.get(entity) == 'on':
+            return mode
 
-        expected = PROGRAM_EXPECTED_STATES[mode]
+    return None
 
-        for entity, expected_state in expected.items():
-            actual_state = states.get(entity)
 
-            # Skip if entity is unavailable (separate check handles this)
-            if actual_state in ['unavailable', 'unknown', None]:
-                continue
+def _any_mode_active(states: Dict[str, Optional[str]]) -> bool:
+    """Check if any pool mode is currently active"""
+    get = states.get
+    return any(get(entity) == 'on' for entity in _MODE_ENTITY_TUPLE)
 
-            if actual_state != expected_state:
-                mismatches.append(f"{entity}: expected '{expected_state}', got '{actual_state}'")
 
+def _validate_program(mode: str, states: Dict[str, Optional[str]]) -> List[Tuple[str, str, str]]:
+    """
+    Validate that current states match expected states for the active mode.
+    Returns (entity, expected, actual) tuples; formatting happens at report time.
+    """
+    mismatches: List[Tuple[str, str, str]] = []
+
+    if mode not in PROGRAM_EXPECTED_STATES:
         return mismatches
 
-    def _check_mode_timeout(self, mode: str) -> bool:
-        """Check if a mode has exceeded its timeout limit"""
-        if mode not in MODE_TIMEOUT_MINUTES:
-            return False
-
-        if mode not in self.mode_start_times:
-            # First time seeing this mode active, record start time
-            self.mode_start_times[mode] = datetime.now()
-            return False
-
-        elapsed = (datetime.now() - self.mode_start_times[mode]).total_seconds() / 60
-        return elapsed > MODE_TIMEOUT_MINUTES[mode]
-
-    def _clear_mode_start_time(self, mode: str):
-        """Clear the start time when a mode is no longer active"""
-        if mode in self.mode_start_times:
-            del self.mode_start_times[mode]
-
-    def _check_startup_sequence(self, states: Dict[str, Any]) -> List[str]:
-        """
-        Monitor startup sequence timing and valve actuation.
-        Returns list of issues found during startup monitoring.
-        """
-        issues = []
-        now = datetime.now()
+    expected = PROGRAM_EXPECTED_STATES[mode]
 
-        sequence_lock = states.get('input_boolean.pool_sequence_lock')
-        power_24vac = states.get('switch.pool_valve_power_24vac_zwave')
-
-        # Track sequence_lock state changes
-        if sequence_lock == 'on' and self.startup_tracking["last_sequence_lock_state"] != 'on':
-            # Sequence lock just turned ON - startup beginning
-            self.startup_tracking["sequence_lock_start"] = now
-            logger.info("Startup sequence detected - sequence_lock turned ON")
-        elif sequence_lock == 'off' and self.startup_tracking["last_sequence_lock_state"] == 'on':
-            # Sequence lock just turned OFF - startup completed
-            if self.startup_tracking["sequence_lock_start"]:
-                duration = (now - self.startup_tracking["sequence_lock_start"]).total_seconds()
-                logger.info(f"Startup sequence completed in {duration:.1f} seconds")
-            # Reset tracking
-            self.startup_tracking["sequence_lock_start"] = None
-            self.startup_tracking["24vac_on_start"] = None
-            self.startup_tracking["valve_switch_on_times"] = {}
-
-        self.startup_tracking["last_sequence_lock_state"] = sequence_lock
-
-        # Track 24VAC power state changes
-        if power_24vac == 'on' and self.startup_tracking["last_24vac_state"] != 'on':
-            # 24VAC just turned ON
-            self.startup_tracking["24vac_on_start"] = now
-            logger.info("24VAC power turned ON for valve actuation")
-        elif power_24vac == 'off' and self.startup_tracking["last_24vac_state"] == 'on':
-            # 24VAC just turned OFF
-            if self.startup_tracking["24vac_on_start"]:
-                duration = (now - self.startup_tracking["24vac_on_start"]).total_seconds()
-                logger.info(f"24VAC power turned OFF after {duration:.1f} seconds")
-            self.startup_tracking["24vac_on_start"] = None
-
-        self.startup_tracking["last_24vac_state"] = power_24vac
-
-        # Track individual valve switch state changes
-        for valve in VALVE_SWITCHES:
-            if valve == "switch.pool_valve_power_24vac_zwave":
-                continue  # Already tracked above
-
-            current_state = states.get(valve)
-            last_state = self.startup_tracking["last_valve_states"].get(valve)
-
-            if current_state == 'on' and last_state != 'on':
-                # Valve switch just turned ON - only track if 24VAC is powered (actually actuating)
-                valve_name = valve.split('.')[-1].replace('_zwave', '')
-                if power_24vac == 'on':
-                    self.startup_tracking["valve_switch_on_times"][valve] = now
-                    logger.info(f"Valve {valve_name} ACTUATING (24VAC powered)")
-                else:
-                    logger.info(f"Valve {valve_name} position set (24VAC off - not actuating)")
-            elif current_state == 'off' and last_state == 'on':
-                # Valve switch just turned OFF
-                if valve in self.startup_tracking["valve_switch_on_times"]:
-                    duration = (now - self.startup_tracking["valve_switch_on_times"][valve]).total_seconds()
-                    valve_name = valve.split('.')[-1].replace('_zwave', '')
-                    logger.info(f"Valve switch {valve_name} turned OFF after {duration:.1f} seconds")
-                    del self.startup_tracking["valve_switch_on_times"][valve]
-
-            self.startup_tracking["last_valve_states"][valve] = current_state
-
-        # Check for timing violations during active startup
-        if sequence_lock == 'on' and self.startup_tracking["sequence_lock_start"]:
-            lock_duration = (now - self.startup_tracking["sequence_lock_start"]).total_seconds()
-            if lock_duration > STARTUP_TIMING["sequence_lock_max"]:
-                issues.append(f"STARTUP_TIMEOUT: Sequence lock has been ON for {lock_duration:.0f}s (max {STARTUP_TIMING['sequence_lock_max']}s) - startup may be stuck")
-
-        # Check 24VAC power timeout
-        if power_24vac == 'on' and self.startup_tracking["24vac_on_start"]:
-            power_duration = (now - self.startup_tracking["24vac_on_start"]).total_seconds()
-            if power_duration > STARTUP_TIMING["24vac_power_max"]:
-                issues.append(f"STARTUP_ISSUE: 24VAC power has been ON for {power_duration:.0f}s (max {STARTUP_TIMING['24vac_power_max']}s) - may damage valve motors")
-
-        # Check individual valve switch timeouts
-        for valve, on_time in list(self.startup_tracking["valve_switch_on_times"].items()):
-            valve_duration = (now - on_time).total_seconds()
-            if valve_duration > STARTUP_TIMING["valve_actuation_max"]:
-                valve_name = valve.split('.')[-1].replace('_zwave', '')
-                issues.append(f"VALVE_STUCK: {valve_name} switch has been ON for {valve_duration:.0f}s (max {STARTUP_TIMING['valve_actuation_max']}s) - valve may be stuck or Z-Wave command failed")
+    for entity, expected_state in expected.items():
+        actual_state = states.get(entity)
 
-        return issues
+        # Skip if entity is unavailable (separate check handles this)
+        if actual_state in _MISSING_STATES:
+            continue
+
+        if actual_state != expected_state:
+            mismatches.append((entity, expected_state, actual_state))
+
+    return mismatches
 
-    def _check_steady_state_valves(self, states: Dict[str, Any]) -> List[str]:
-        """
-        During steady-state operation (no startup in progress),
-        24VAC power should be OFF. Valve direction switches stay ON to indicate
-        position - they are depowered by turning off 24VAC, not by turning off
-        the direction switches.
-        """
-        issues = []
-        sequence_lock = states.get('input_boolean.pool_sequence_lock')
-        power_24vac = states.get('switch.pool_valve_power_24vac_zwave')
-
-        # Only check if NOT in startup sequence
-        if sequence_lock == 'on':
-            return issues  # Startup in progress, 24VAC may legitimately be ON
-
-        # The only issue is if 24VAC is ON during steady-state (no startup)
-        # Valve direction switches being ON is NORMAL - they indicate position
-        if power_24vac == 'on':
-            issues.append(f"24VAC_ON_STEADY_STATE: 24VAC power is ON but no startup in progress - valves may be actuating unnecessarily")
 
+def _check_mode_timeout(mode: str, mode_start_times: Dict[str, datetime], now: datetime) -> bool:
+    """Check if a mode has exceeded its timeout limit"""
+    limit = _MODE_TIMEOUT_DELTAS.get(mode)
+    if limit is None:
+        return False
+
+    start = mode_start_times.get(mode)
+    if start is None:
+        # First time seeing this mode active, record start time
+        mode_start_times[mode] = now
+        return False
+
+    return (now - start) > limit
+
+
+def _check_startup_sequence(states: _StateMap, tracking: _StartupTracking,
+                            now: datetime, now_mono: float) -> List[str]:
+    """
+    Monitor startup sequence timing and valve actuation.
+    Returns list of issues found during startup monitoring.
+    """
+    issues: List[str] = []
+
+    sequence_lock = states.get(E_SEQ_LOCK)
+    power_24vac = states.get(E_POWER_24VAC)
+    valve_states = _valve_getter(states)
+    valve_start_times = tracking.valve_start_times
+    last_valve_states = tracking.last_valve_states
+
+    # Fast path: steady state with nothing actuating - no transitions or timers to evaluate.
+    # Valve positions are still recorded so the next real transition compares against fresh states.
+    changed = (sequence_lock != tracking.last_sequence_lock_state
+               or power_24vac != tracking.last_24vac_state)
+    if (not changed and valve_start_times.count(None) == _VALVE_COUNT
+            and sequence_lock == 'off' and power_24vac == 'off'):
+        last_valve_states[:] = valve_states
         return issues
 
+    # Track sequence_lock state changes
+    if sequence_lock == 'on' and tracking.last_sequence_lock_state != 'on':
+        # Sequence lock just turned ON - startup beginning
+        tracking.sequence_lock_start = now
+        logger.info("Startup sequence detected - sequence_lock turned ON")
+    elif sequence_lock == 'off' and tracking.last_sequence_lock_state == 'on':
+        # Sequence lock just turned OFF - startup completed
+        if tracking.sequence_lock_start:
+            duration = (now - tracking.sequence_lock_start).total_seconds()
+            logger.info(f"Startup sequence completed in {duration:.1f} seconds")
+        # Reset tracking
+        tracking.sequence_lock_start = None
+        tracking.power24_on_start = None
+        valve_start_times[:] = [None] * _VALVE_COUNT
+
+    tracking.last_sequence_lock_state = sequence_lock
+
+    # Track 24VAC power state changes
+    if power_24vac == 'on' and tracking.last_24vac_state != 'on':
+        # 24VAC just turned ON
+        tracking.power24_on_start = now
+        logger.info("24VAC power turned ON for valve actuation")
+    elif power_24vac == 'off' and tracking.last_24vac_state == 'on':
+        # 24VAC just turned OFF
+        if tracking.power24_on_start:
+            duration = (now - tracking.power24_on_start).total_seconds()
+            logger.info(f"24VAC power turned OFF after {duration:.1f} seconds")
+        tracking.power24_on_start = None
+
+    tracking.last_24vac_state = power_24vac
+
+    # Track individual valve switch state changes (index 0 is 24VAC, tracked above)
+    for idx in range(1, _VALVE_COUNT):
+        current_state = valve_states[idx]
+        last_state = last_valve_states[idx]
+
+        if current_state == 'on' and last_state != 'on':
+            # Valve switch just turned ON - only track if 24VAC is powered (actually actuating)
+            valve_name = _VALVE_NAME_LIST[idx]
+            if power_24vac == 'on':
+                valve_start_times[idx] = now_mono
+                logger.info(f"Valve {valve_name} ACTUATING (24VAC powered)")
+            else:
+                logger.info(f"Valve {valve_name} position set (24VAC off - not actuating)")
+        elif current_state == 'off' and last_state == 'on':
+            # Valve switch just turned OFF
+            on_time = valve_start_times[idx]
+            if on_time is not None:
+                duration = now_mono - on_time
+                logger.info(f"Valve switch {_VALVE_NAME_LIST[idx]} turned OFF after {duration:.1f} seconds")
+                valve_start_times[idx] = None
+
+        last_valve_states[idx] = current_state
+
+    # Check for timing violations during active startup
+    if sequence_lock == 'on' and tracking.sequence_lock_start:
+        lock_duration = (now - tracking.sequence_lock_start).total_seconds()
+        if lock_duration > STARTUP_TIMING["sequence_lock_max"]:
+            issues.append(f"STARTUP_TIMEOUT: Sequence lock has been ON for {lock_duration:.0f}s (max {STARTUP_TIMING['sequence_lock_max']}s) - startup may be stuck")
+
+    # Check 24VAC power timeout
+    if power_24vac == 'on' and tracking.power24_on_start:
+        power_duration = (now - tracking.power24_on_start).total_seconds()
+        if power_duration > STARTUP_TIMING["24vac_power_max"]:
+            issues.append(f"STARTUP_ISSUE: 24VAC power has been ON for {power_duration:.0f}s (max {STARTUP_TIMING['24vac_power_max']}s) - may damage valve motors")
+
+    # Check individual valve switch timeouts
+    for idx, on_time in enumerate(valve_start_times):
+        if on_time is None:
+            continue
+        valve_duration = now_mono - on_time
+        if valve_duration > STARTUP_TIMING["valve_actuation_max"]:
+            valve_name = _VALVE_NAME_LIST[idx]
+            issues.append(f"VALVE_STUCK: {valve_name} switch has been ON for {valve_duration:.0f}s (max {STARTUP_TIMING['valve_actuation_max']}s) - valve may be stuck or Z-Wave command failed")
+
+    return issues
+
+
+def _check_steady_state_valves(states: Dict[str, Optional[str]]) -> List[str]:
+    """
+    During steady-state operation (no startup in progress),
+    24VAC power should be OFF. Valve direction switches stay ON to indicate
+    position - they are depowered by turning off 24VAC, not by turning off
+    the direction switches.
+    """
+    issues: List[str] = []
+    sequence_lock = states.get(E_SEQ_LOCK)
+    power_24vac = states.get(E_POWER_24VAC)
+
+    # Only check if NOT in startup sequence
+    if sequence_lock == 'on':
+        return issues  # Startup in progress, 24VAC may legitimately be ON
+
+    # The only issue is if 24VAC is ON during steady-state (no startup)
+    # Valve direction switches being ON is NORMAL - they indicate position
+    if power_24vac == 'on':
+        issues.append(f"24VAC_ON_STEADY_STATE: 24VAC power is ON but no startup in progress - valves may be actuating unnecessarily")
+
+    return issues
+
+
+def _analyze(states: _StateMap, tracking: _StartupTracking,
+             mode_start_times: Dict[str, datetime], now: datetime, now_mono: float) -> List[str]:
+    """
+    Run every pool check against one state snapshot and return the issues.
+    Updates tracking and mode_start_times in place for the next check.
+    """
+    issues: List[str] = []
+    issues_append = issues.append
+
+    # Entities used directly below, in _CHECK_KEYS order (None if missing)
+    (sensor_failure, temp, hot_tub_heat, pool_heat, pump,
+     sequence_lock, pool_action, skimmer, waterfall) = _check_getter(states)
+
+    # Determine active mode
+    active_mode = _get_active_mode(states)
+
+    # Clear start times for modes that are no longer active
+    for mode in list(mode_start_times.keys()):
+        if mode != active_mode:
+            del mode_start_times[mode]
+
+    # Check for sensor failure
+    if sensor_failure == 'on':
+        issues_append("CRITICAL: Temperature sensor failure detected")
+
+    # Check temperature sensor availability
+    if temp in _MISSING_STATES:
+        issues_append("WARNING: Temperature sensor unavailable")
+
+    # Check for overheat / out-of-range temperature
+    if temp and temp not in _MISSING_STATES:
+        temp_f: Optional[float]
+        try:
+            temp_f = float(temp)
+        except (ValueError, TypeError):
+            temp_f = None
+        # NaN compares false against every threshold (no issue), but bisect would file it as "very low"
+        if temp_f is not None and not math.isnan(temp_f):
+            message = _TEMP_BAND_MESSAGES[bisect_left(_TEMP_BAND_EDGES, temp_f)]
+            if message:
+                issues_append(message.format(t=temp_f))
+
+    # Check heating mode + pump status
+    if (hot_tub_heat == 'on' or pool_heat == 'on') and pump == 'off':
+        issues_append("CRITICAL: Heating mode active but pump is OFF")
+
+    if (hot_tub_heat == 'on' or pool_heat == 'on') and pump == 'unavailable':
+        issues_append("CRITICAL: Pump unavailable during heating mode")
+
+    # Check for stuck sequence lock
+    any_mode_active = _any_mode_active(states)
+
+    if sequence_lock == 'on' and not any_mode_active:
+        issues_append("WARNING: Sequence lock stuck ON (no mode active)")
+
+    # Check for stuck pool_action flag
+    if pool_action == 'on' and not any_mode_active:
+        issues_append("WARNING: Pool action flag stuck ON (no mode active)")
+
+    # Check Z-Wave valve availability
+    unavailable_valves = [v for v in _ZWAVE_VALVES if states.get(v) == 'unavailable']
+    if len(unavailable_valves) >= 3:
+        issues_append(f"CRITICAL: {len(unavailable_valves)} Z-Wave valves unavailable - Z-Wave issue")
+    elif unavailable_valves:
+        issues_append(f"WARNING: {len(unavailable_valves)} Z-Wave valve(s) unavailable: {', '.join([_VALVE_NAMES[v] for v in unavailable_valves])}")
+
+    # Check valve tracker mismatches during heating
+    for mode_entity, trackers, message in _HEATING_INVARIANTS:
+        if states.get(mode_entity) == 'on':
+            for tracker in trackers:
+                if states.get(tracker) == 'off':
+                    issues_append(message)
+                    break
+
+    # Check for mutual exclusion violations
+    if skimmer == 'on' and waterfall == 'on':
+        issues_append("WARNING: Both skimmer and waterfall active (conflict)")
+
+    # Check off-hours pump (6 PM - 8 AM)
+    current_hour = now.hour
+    is_quiet_hours = current_hour >= 18 or current_hour < 8
+
+    if is_quiet_hours and pump == 'on' and not any_mode_active:
+        issues_append("WARNING: Pump running during quiet hours with no mode active (orphan pump)")
+
+    # ========== STARTUP SEQUENCE MONITORING ==========
+    # Monitor valve actuation timing during startup sequences
+    issues.extend(_check_startup_sequence(states, tracking, now, now_mono))
+
+    # Check valve switches are OFF during steady-state
+    issues.extend(_check_steady_state_valves(states))
+
+    # ========== PROGRAM VALIDATION ==========
+    # Validate that active mode has correct states
+    if active_mode:
+        mismatches = _validate_program(active_mode, states)
+        if mismatches:
+            issues_append(f"PROGRAM_MISMATCH: {active_mode} has incorrect states: {_format_mismatches(mismatches)}")
+
+        # Check mode timeout (e.g., hot_tub_empty > 6 minutes)
+        if _check_mode_timeout(active_mode, mode_start_times, now):
+            timeout_mins = MODE_TIMEOUT_MINUTES.get(active_mode, 0)
+            issues_append(f"MODE_TIMEOUT: {active_mode} has been running longer than {timeout_mins} minutes")
+    else:
+        # No mode active - validate "no_mode" state
+        mismatches = _validate_program("no_mode", states)
+        # Filter out pump mismatch during scheduled hours (8 AM - 6 PM) - pump may legitimately be off
+        # Only flag if heater or action flags are wrong when no mode is active
+        critical_mismatches = [m for m in mismatches if m[0] in _CRITICAL_NO_MODE_ENTITIES]
+        if critical_mismatches:
+            issues_append(f"NO_MODE_MISMATCH: System flags incorrect with no mode active: {_format_mismatches(critical_mismatches)}")
+
+    return issues
+
+
+class PoolAgent(BaseAgent):
+    """Monitors pool and hot tub systems with auto-fix capabilities"""
+
+    def __init__(self, ha_client):
+        super().__init__("pool", ha_client)
+
+        # Shared module-level tuple - no per-instance list to build
+        self.monitored_entities = _MONITORED_ENTITIES_TUPLE
+
+        # Z-Wave valve entities for availability checks
+        self.zwave_valves = _ZWAVE_VALVES
+
+        # Track mode start times for timeout detection
+        self.mode_start_times: Dict[str, datetime] = {}
+
+        # Track startup sequence state
+        self.startup_tracking = _StartupTracking()
+
+    async def get_monitored_entities(self) -> Tuple[str, ...]:
+        return _MONITORED_ENTITIES_TUPLE
+
     async def check(self) -> AgentCheck:
         """Perform pool system health check"""
-        states = await self.get_states(self.monitored_entities)
-        issues = []
-
-        # Determine active mode
-        active_mode = self._get_active_mode(states)
-
-        # Clear start times for modes that are no longer active
-        for mode in list(self.mode_start_times.keys()):
-            if mode != active_mode:
-                self._clear_mode_start_time(mode)
-
-        # Check for sensor failure
-        sensor_failure = states.get('input_boolean.pool_sensor_failure_detected')
-        if sensor_failure == 'on':
-            issues.append("CRITICAL: Temperature sensor failure detected")
-
-        # Check temperature sensor availability
-        temp = states.get('sensor.pool_heater_wifi_temperature')
-        if temp in ['unavailable', 'unknown', None]:
-            issues.append("WARNING: Temperature sensor unavailable")
-
-        # Check for overheat
-        if temp and temp not in ['unavailable', 'unknown']:
-            try:
-                temp_f = float(temp)
-                if temp_f > 105:
-                    issues.append(f"CRITICAL: Overheat detected ({temp_f}°F)")
-                elif temp_f > 103:
-                    issues.append(f"WARNING: Temperature high ({temp_f}°F)")
-                elif temp_f < 40:
-                    issues.append(f"WARNING: Temperature very low ({temp_f}°F) - possible sensor issue")
-            except (ValueError, TypeError):
-                pass
-
-        # Check heating mode + pump status
-        hot_tub_heat = states.get('input_boolean.hot_tub_heat')
-        pool_heat = states.get('input_boolean.pool_heat')
-        pump = states.get('switch.pool_pump_zwave')
-
-        if (hot_tub_heat == 'on' or pool_heat == 'on') and pump == 'off':
-            issues.append("CRITICAL: Heating mode active but pump is OFF")
-
-        if (hot_tub_heat == 'on' or pool_heat == 'on') and pump == 'unavailable':
-            issues.append("CRITICAL: Pump unavailable during heating mode")
-
-        # Check for stuck sequence lock
-        sequence_lock = states.get('input_boolean.pool_sequence_lock')
-        pool_action = states.get('input_boolean.pool_action')
-        any_mode_active = self._any_mode_active(states)
-
-        if sequence_lock == 'on' and not any_mode_active:
-            issues.append("WARNING: Sequence lock stuck ON (no mode active)")
-
-        # Check for stuck pool_action flag
-        if pool_action == 'on' and not any_mode_active:
-            issues.append("WARNING: Pool action flag stuck ON (no mode active)")
-
-        # Check Z-Wave valve availability
-        unavailable_valves = [v for v in self.zwave_valves if states.get(v) == 'unavailable']
-        if len(unavailable_valves) >= 3:
-            issues.append(f"CRITICAL: {len(unavailable_valves)} Z-Wave valves unavailable - Z-Wave issue")
-        elif unavailable_valves:
-            issues.append(f"WARNING: {len(unavailable_valves)} Z-Wave valve(s) unavailable: {', '.join([v.split('.')[-1] for v in unavailable_valves])}")
-
-        # Check valve tracker mismatches during heating
-        if hot_tub_heat == 'on':
-            spa_suction_tracker = states.get('input_boolean.pool_valve_spa_suction_position_tracker')
-            spa_return_tracker = states.get('input_boolean.pool_valve_spa_return_position_tracker')
-            if spa_suction_tracker == 'off' or spa_return_tracker == 'off':
-                issues.append("CRITICAL: Hot tub heat ON but valve trackers show WRONG position (drainage risk)")
-
-        if pool_heat == 'on':
-            pool_suction_tracker = states.get('input_boolean.pool_valve_pool_suction_position_tracker')
-            pool_return_tracker = states.get('input_boolean.pool_valve_pool_return_position_tracker')
-            if pool_suction_tracker == 'off' or pool_return_tracker == 'off':
-                issues.append("WARNING: Pool heat ON but valve trackers may be wrong")
-
-        # Check for mutual exclusion violations
-        skimmer = states.get('input_boolean.pool_skimmer')
-        waterfall = states.get('input_boolean.pool_waterfall')
-        if skimmer == 'on' and waterfall == 'on':
-            issues.append("WARNING: Both skimmer and waterfall active (conflict)")
-
-        # Check off-hours pump (6 PM - 8 AM)
-        current_hour = datetime.now().hour
-        is_quiet_hours = current_hour >= 18 or current_hour < 8
-
-        if is_quiet_hours and pump == 'on' and not any_mode_active:
-            issues.append("WARNING: Pump running during quiet hours with no mode active (orphan pump)")
-
-        # ========== STARTUP SEQUENCE MONITORING ==========
-        # Monitor valve actuation timing during startup sequences
-        startup_issues = self._check_startup_sequence(states)
-        issues.extend(startup_issues)
-
-        # Check valve switches are OFF during steady-state
-        steady_state_issues = self._check_steady_state_valves(states)
-        issues.extend(steady_state_issues)
-
-        # ========== PROGRAM VALIDATION ==========
-        # Validate that active mode has correct states
-        if active_mode:
-            mismatches = self._validate_program(active_mode, states)
-            if mismatches:
-                issues.append(f"PROGRAM_MISMATCH: {active_mode} has incorrect states: {'; '.join(mismatches)}")
-
-            # Check mode timeout (e.g., hot_tub_empty > 6 minutes)
-            if self._check_mode_timeout(active_mode):
-                timeout_mins = MODE_TIMEOUT_MINUTES.get(active_mode, 0)
-                issues.append(f"MODE_TIMEOUT: {active_mode} has been running longer than {timeout_mins} minutes")
-        else:
-            # No mode active - validate "no_mode" state
-            mismatches = self._validate_program("no_mode", states)
-            # Filter out pump mismatch during scheduled hours (8 AM - 6 PM) - pump may legitimately be off
-            # Only flag if heater or action flags are wrong when no mode is active
-            critical_mismatches = [m for m in mismatches if 'pool_heater' in m or 'pool_action' in m or 'pool_sequence_lock' in m]
-            if critical_mismatches:
-                issues.append(f"NO_MODE_MISMATCH: System flags incorrect with no mode active: {'; '.join(critical_mismatches)}")
+        states = await self.get_states(_MONITORED_ENTITIES_TUPLE)
+        # Intern keys and string values so downstream comparisons take the identity fast path
+        states = _StateMap({_intern(k): (_intern(v) if isinstance(v, str) else v) for k, v in states.items()})
+
+        # Single logical instant for the whole check
+        now = datetime.now()
+
+        issues = _analyze(states, self.startup_tracking, self.mode_start_times, now, time.monotonic())
 
         self.last_check = AgentCheck(
             agent_name=self.name,
             issues=issues,
             states=states,
             recent_events=[],
-            check_time=datetime.now().isoformat()
+            check_time=now.isoformat()
         )
 
         return self.last_check
 
-    def _any_mode_active(self, states: Dict[str, Any]) -> bool:
-        """Check if any pool mode is currently active"""
-        return any([
-            states.get('input_boolean.hot_tub_heat') == 'on',
-            states.get('input_boolean.pool_heat') == 'on',
-            states.get('input_boolean.pool_skimmer') == 'on',
-            states.get('input_boolean.pool_waterfall') == 'on',
-            states.get('input_boolean.pool_vacuum') == 'on',
-            states.get('input_boolean.hot_tub_empty') == 'on'
-        ])
-
     def get_rules(self) -> Dict[str, Any]:
         return {
             "temperature_limits": {
@@ -3,12 +3,34 @@ Security Agent - Monitors security systems
 """
 
 import logging
+import time
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from .base import BaseAgent, AgentCheck
 
 logger = logging.getLogger(__name__)
 
+# Adaptive check interval (in seconds): back off while the house is quiet,
+# snap back to the minimum on any issue, state change, or at night
+CHECK_INTERVAL_SECONDS = {
+    "initial": 30,
+    "min": 5,
+    "max": 300,
+}
+
+
+def _category_of(entity_id: str) -> Optional[str]:
+    """Classify a security entity by the checks that apply to it"""
+    if entity_id.startswith('lock.'):
+        return 'lock'
+    if entity_id.startswith('binary_sensor.') and 'door' in entity_id:
+        return 'door_sensor'
+    if entity_id.startswith('camera.'):
+        return 'camera'
+    if entity_id.startswith('alarm_control_panel.'):
+        return 'alarm'
+    return None
+
 
 class SecurityAgent(BaseAgent):
     """Monitors security systems (locks, cameras, doors)"""
@@ -41,43 +63,99 @@ class SecurityAgent(BaseAgent):
             "alarm_control_panel.home_alarm",
         ]
 
+        # Entity roles are fixed, so classify once here instead of on every check
+        self._entity_category = {e: _category_of(e) for e in self.monitored_entities}
+
+        # Issue messages for the fixed entity set, formatted once
+        self._msg_unlocked_night = {e: f"unlocked_at_night: {e} is unlocked during night hours"
+                                    for e, c in self._entity_category.items() if c == 'lock'}
+        self._msg_door_open_night = {e: f"door_open_night: {e} open during night"
+                                     for e, c in self._entity_category.items() if c == 'door_sensor'}
+        self._msg_camera_offline = {e: f"camera_offline: {e} is offline"
+                                    for e, c in self._entity_category.items() if c == 'camera'}
+        self._alarm_id = 'alarm_control_panel.home_alarm'
+
+        # (hour, is_night) - only recomputed when the local hour changes
+        self._is_night_cache: Tuple[int, bool] = (-1, False)
+
+        # Adaptive scheduling state (time.monotonic() based)
+        self._interval_seconds = CHECK_INTERVAL_SECONDS["initial"]
+        self._next_check_at = 0.0
+        self._last_state_hash: Optional[int] = None
+        self._last_is_night: Optional[bool] = None
+
+    def is_due(self) -> bool:
+        """Skip checks until the adaptive interval has elapsed"""
+        return time.monotonic() >= self._next_check_at
+
+    def _update_interval(self, state_hash: int, issues: List[str], is_night: bool):
+        """Double the interval while quiet and unchanged; otherwise reset it"""
+        if issues or is_night or state_hash != self._last_state_hash:
+            self._interval_seconds = CHECK_INTERVAL_SECONDS["min"]
+        else:
+            self._interval_seconds = min(self._interval_seconds * 2, CHECK_INTERVAL_SECONDS["max"])
+        self._last_state_hash = state_hash
+        self._next_check_at = time.monotonic() + self._interval_seconds
+
+    def _is_night(self) -> bool:
+        """Night hours are 22:00-06:00 local time"""
+        hour = time.localtime().tm_hour
+        cached_hour, is_night = self._is_night_cache
+        if hour != cached_hour:
+            is_night = hour >= 22 or hour < 6
+            self._is_night_cache = (hour, is_night)
+        return is_night
+
     async def get_monitored_entities(self) -> List[str]:
         return self.monitored_entities
 
     async def check(self) -> AgentCheck:
         """Perform security health check"""
-        states = await self.get_states(self.monitored_entities)
+        # Missing entities count as 'unavailable' here (an absent alarm or camera is itself an issue)
+        fetched = await self.get_states(self.monitored_entities)
+        states = {e: fetched.get(e, 'unavailable') for e in self.monitored_entities}
         issues = []
 
-        current_hour = datetime.now().hour
-        is_night = current_hour >= 22 or current_hour < 6
+        is_night = self._is_night()
 
-        # Check locks at night
-        if is_night:
-            for entity_id, state in states.items():
-                if entity_id.startswith('lock.') and state == 'unlocked':
-                    issues.append(f"unlocked_at_night: {entity_id} is unlocked during night hours")
+        # Issues depend only on states and is_night - reuse the last result if neither changed
+        state_hash = hash(tuple(sorted(states.items())))
+        if (self.last_check is not None and state_hash == self._last_state_hash
+                and is_night == self._last_is_night):
+            self._update_interval(state_hash, self.last_check.issues, is_night)
+            self.last_check.check_time = datetime.now().isoformat()
+            return self.last_check
 
-        # Check for doors left open
-        for entity_id, state in states.items():
-            if entity_id.startswith('binary_sensor.') and 'door' in entity_id:
-                if state == 'on':  # on = open for door sensors
-                    if is_night:
-                        issues.append(f"door_open_night: {entity_id} open during night")
-                    # Even during day, doors open for extended periods might be an issue
-                    # Would need state history to detect this properly
-
-        # Check cameras online
+        # Single pass over the states, dispatching on the precomputed category
+        entity_category = self._entity_category
         for entity_id, state in states.items():
-            if entity_id.startswith('camera.'):
-                if state in ['unavailable', 'unknown']:
-                    issues.append(f"camera_offline: {entity_id} is offline")
+            category = entity_category.get(entity_id)
+
+            if category == 'lock':
+                # Check locks at night
+                if is_night and state == 'unlocked':
+                    issues.append(self._msg_unlocked_night[entity_id])
+
+            elif category == 'door_sensor':
+                # Check for doors left open (on = open for door sensors)
+                if is_night and state == 'on':
+                    issues.append(self._msg_door_open_night[entity_id])
+                # Even during day, doors open for extended periods might be an issue
+                # Would need state history to detect this properly
+
+            elif category == 'camera':
+                # Check cameras online
+                if state in ('unavailable', 'unknown'):
+                    issues.append(self._msg_camera_offline[entity_id])
 
         # Check alarm state at night
-        alarm = states.get('alarm_control_panel.home_alarm')
+        alarm = states.get(self._alarm_id)
         if is_night and alarm == 'disarmed':
             issues.append("alarm_disarmed_night: Alarm disarmed during night hours")
 
+        self._last_is_night = is_night
+        self._update_interval(state_hash, issues, is_night)
+
         self.last_check = AgentCheck(
             agent_name=self.name,
             issues=issues,
@@ -93,5 +171,6 @@ class SecurityAgent(BaseAgent):
             "night_hours": {"start": 22, "end": 6},
             "lock_at_night": True,
             "arm_at_night": True,
-            "cameras_required_online": True
+            "cameras_required_online": True,
+            "check_interval_seconds": {**CHECK_INTERVAL_SECONDS, "current": self._interval_seconds}
         }
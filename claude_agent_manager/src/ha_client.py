@@ -3,12 +3,61 @@ Home Assistant API Client
 """
 
 import os
+import re
+import json
+import time
+import asyncio
 import logging
 import aiohttp
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, FrozenSet, Iterable, Optional, List, Tuple
 
 logger = logging.getLogger(__name__)
 
+# orjson encodes/decodes HA payloads (notably the bulk /api/states) several times faster (optional)
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+# msgspec decodes the bulk /api/states body straight into (entity_id, state) rows,
+# skipping the attributes dicts entirely (optional - orjson/json + projection otherwise)
+try:
+    import msgspec
+
+    class _StateRow(msgspec.Struct):
+        entity_id: str
+        state: str = 'unknown'
+
+    _decode_state_rows = msgspec.json.Decoder(List[_StateRow]).decode
+except ImportError:
+    _decode_state_rows = None
+
+# Socket-level timeouts: unlike total=, these don't count time the event loop
+# spends on other tasks, so a busy agent can't time out a fast HA request
+STATE_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=3, sock_read=7)
+SERVICE_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=3, sock_read=27)
+HEALTH_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=2, sock_read=3)
+# Seconds to wait for the result of a service call sent over the WebSocket
+WS_SERVICE_TIMEOUT = 30
+# WebSocket keepalive: ping every WS_HEARTBEAT seconds, drop the connection if a
+# pong doesn't come back within half that (aiohttp default)
+WS_HEARTBEAT = 20
+# Largest frame accepted - the get_states seed on a big install can exceed aiohttp's 4 MB default
+WS_MAX_MSG_SIZE = 16 * 1024 * 1024
+# A connection that stayed up this long (seconds) resets the reconnect backoff
+WS_STABLE_AFTER = 60
+
+# Entity id of a state_changed event, read from the raw frame without decoding it.
+# Matches HA's compact key order; frames that don't match are simply decoded.
+_WS_STATE_EVENT_RE = re.compile(
+    r'\{"id":\d+,"type":"event","event":\{"event_type":"state_changed","data":\{"entity_id":"([^"]+)"'
+)
+
 
 class HAClient:
     """Client for Home Assistant Supervisor API"""
@@ -20,40 +69,311 @@ class HAClient:
         if not self.token:
             logger.warning("SUPERVISOR_TOKEN not set - API calls will fail")
 
-    @property
-    def headers(self) -> Dict[str, str]:
-        return {
+        # Token never changes, so build the auth headers once
+        self._headers = {
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json"
         }
 
+        # Shared keep-alive session, created on first request (needs a running loop)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Short-lived read cache so agents polling in the same cycle share one fetch
+        # Format: {entity_id: (fetched_at, state_object)}; bulk map kept separately
+        self._cache_ttl = float(os.environ.get('HA_CACHE_TTL', '2.0'))
+        self._cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._all_states_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        # Bulk fetch in progress, shared by agents that miss the cache at the same time
+        self._all_states_task: Optional[asyncio.Task] = None
+
+        # Validators from the last 200 on /api/states for conditional GETs
+        # Format: (etag, last_modified, decoded_states)
+        self._all_states_validators: Optional[Tuple[Optional[str], Optional[str], Dict[str, Any]]] = None
+
+        # Push-updated {entity_id: state} from the WebSocket API (see ws_connect)
+        # Only trusted while _live_ready is set; REST is used otherwise
+        self._live_states: Dict[str, Any] = {}
+
+        # Entities the live map tracks (None = all); see watch_entities
+        self._watched: Optional[FrozenSet[str]] = None
+        self._live_ready = False
+        # A stream silent for longer than this is treated as stale (0 = never)
+        self._live_max_age = float(os.environ.get('HA_LIVE_MAX_AGE', '600'))
+        self._live_seen_at = 0.0
+        self._ws_task: Optional[asyncio.Task] = None
+
+        # Open WebSocket (set once authenticated) and its in-flight commands
+        # Ids 1 and 2 are the subscription and seed; commands count up from 3
+        # Format: {message_id: future resolved with the result message}
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._ws_next_id = 3
+        self._ws_pending: Dict[int, asyncio.Future] = {}
+
+        # Notifications/logbook entries queued during a cycle, sent together by flush_outbox()
+        # Format: [(domain, service, data), ...]
+        self._outbox: List[Tuple[str, str, Dict[str, Any]]] = []
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return self._headers
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it if needed"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=32, limit_per_host=16, enable_cleanup_closed=True)
+            self._session = aiohttp.ClientSession(connector=connector, headers=self._headers,
+                                                  json_serialize=_json_dumps)
+        return self._session
+
+    async def close(self):
+        """Close the shared session (call at shutdown)"""
+        if self._ws_task is not None:
+            self._ws_task.cancel()
+            try:
+                await self._ws_task
+            except asyncio.CancelledError:
+                pass
+            self._ws_task = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def watch_entities(self, entity_ids: Iterable[str]):
+        """Limit the WebSocket live map to these entities (call before ws_connect).
+
+        state_changed frames for other entities are dropped before JSON decoding,
+        and reads of unwatched entities go to REST instead.
+        """
+        self._watched = frozenset(entity_ids)
+
+    async def ws_connect(self):
+        """Start keeping states current from the WebSocket state_changed stream"""
+        if self._ws_task is None or self._ws_task.done():
+            self._ws_task = asyncio.create_task(self._ws_loop())
+
+    async def _ws_loop(self):
+        """Maintain the WebSocket subscription, reconnecting with backoff"""
+        ws_url = self.base_url.replace('http', 'ws', 1) + "/api/websocket"
+        backoff = 1
+        while True:
+            connected_at = None
+            try:
+                session = await self._get_session()
+                async with session.ws_connect(ws_url, heartbeat=WS_HEARTBEAT,
+                                              max_msg_size=WS_MAX_MSG_SIZE) as ws:
+                    await self._ws_subscribe(ws)
+                    self._ws = ws
+                    connected_at = time.monotonic()
+                    async for msg in ws:
+                        if msg.type != aiohttp.WSMsgType.TEXT:
+                            break
+                        self._live_seen_at = time.monotonic()
+                        if self._watched is not None:
+                            match = _WS_STATE_EVENT_RE.match(msg.data)
+                            if match is not None and match.group(1) not in self._watched:
+                                continue
+                        self._ws_handle(msg.json(loads=_json_loads))
+
+                # 1000/1001 are normal closes (e.g. HA restarting); anything else is worth a warning
+                if ws.close_code in (1000, 1001):
+                    logger.info("WebSocket closed by Home Assistant (code %s)", ws.close_code)
+                else:
+                    logger.warning("WebSocket closed abnormally (code %s)", ws.close_code)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"WebSocket error: {e}")
+            finally:
+                self._live_ready = False
+                self._ws = None
+                # Commands still waiting will never get their result
+                for future in self._ws_pending.values():
+                    if not future.done():
+                        future.set_exception(ConnectionError("WebSocket closed"))
+                self._ws_pending.clear()
+
+            # Only a connection that held up resets the backoff, so a flapping one can't storm
+            if connected_at is not None and time.monotonic() - connected_at >= WS_STABLE_AFTER:
+                backoff = 1
+            logger.info(f"WebSocket disconnected - using REST, reconnecting in {backoff}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    async def _ws_subscribe(self, ws: aiohttp.ClientWebSocketResponse):
+        """Authenticate, subscribe to state changes, then seed the map with get_states"""
+        msg = await ws.receive_json(loads=_json_loads)
+        if msg.get('type') != 'auth_required':
+            raise ConnectionError(f"Unexpected WebSocket greeting: {msg.get('type')}")
+        await ws.send_json({"type": "auth", "access_token": self.token}, dumps=_json_dumps)
+        msg = await ws.receive_json(loads=_json_loads)
+        if msg.get('type') != 'auth_ok':
+            raise ConnectionError(f"WebSocket auth failed: {msg.get('message', msg.get('type'))}")
+
+        # Subscribe before seeding so no change between the two is missed
+        await ws.send_json({"id": 1, "type": "subscribe_events", "event_type": "state_changed"}, dumps=_json_dumps)
+        await ws.send_json({"id": 2, "type": "get_states"}, dumps=_json_dumps)
+        logger.info("WebSocket connected - subscribed to state changes")
+
+    def _ws_handle(self, msg: Dict[str, Any]):
+        """Apply one WebSocket message to the live state map"""
+        msg_type = msg.get('type')
+        watched = self._watched
+        if msg_type == 'event':
+            data = msg.get('event', {}).get('data', {})
+            if watched is not None and data.get('entity_id') not in watched:
+                return
+            new_state = data.get('new_state')
+            if new_state is None:
+                self._live_states.pop(data.get('entity_id'), None)
+            else:
+                self._live_states[new_state['entity_id']] = new_state.get('state', 'unknown')
+        elif msg_type == 'result' and msg.get('id') in self._ws_pending:
+            future = self._ws_pending.pop(msg['id'])
+            if not future.done():
+                future.set_result(msg)
+        elif msg_type == 'result' and msg.get('id') == 2:
+            if msg.get('success'):
+                self._live_states = {s['entity_id']: s.get('state', 'unknown') for s in msg.get('result', [])
+                                     if watched is None or s['entity_id'] in watched}
+                self._live_ready = True
+            else:
+                logger.warning(f"WebSocket get_states failed: {msg.get('error')}")
+
+    def _live_usable(self) -> bool:
+        """True if the live map is seeded and the stream hasn't gone quiet"""
+        if not self._live_ready:
+            return False
+        if self._live_max_age > 0 and time.monotonic() - self._live_seen_at > self._live_max_age:
+            return False
+        return True
+
+    def get_cached_state(self, entity_id: str) -> Optional[str]:
+        """State string from the live map, or None if it isn't tracked or is stale"""
+        if not self._live_usable():
+            return None
+        if self._watched is not None and entity_id not in self._watched:
+            return None
+        return self._live_states.get(entity_id)
+
+    def set_cache_ttl(self, ttl: float):
+        """Change how long (seconds) reads are served from cache; 0 disables caching"""
+        self._cache_ttl = ttl
+        if ttl <= 0:
+            self.invalidate()
+
+    def invalidate(self, entity_id: Optional[str] = None):
+        """Drop cached reads for one entity, or everything if no entity is given"""
+        self._all_states_cache = None
+        if entity_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(entity_id, None)
+
     async def get_state(self, entity_id: str) -> Optional[Dict[str, Any]]:
         """Get current state of an entity"""
+        cached = self._cache.get(entity_id)
+        if cached and time.monotonic() - cached[0] < self._cache_ttl:
+            return cached[1]
+
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/api/states/{entity_id}",
-                    headers=self.headers,
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as resp:
-                    if resp.status == 200:
-                        return await resp.json()
-                    elif resp.status == 404:
-                        logger.debug(f"Entity not found: {entity_id}")
-                        return None
-                    else:
-                        logger.warning(f"Failed to get state for {entity_id}: {resp.status}")
-                        return None
+            session = await self._get_session()
+            async with session.get(
+                f"{self.base_url}/api/states/{entity_id}",
+                timeout=STATE_TIMEOUT
+            ) as resp:
+                if resp.status == 200:
+                    state = await resp.json(loads=_json_loads)
+                    self._cache[entity_id] = (time.monotonic(), state)
+                    return state
+                elif resp.status == 404:
+                    logger.debug("Entity not found: %s", entity_id)
+                    return None
+                else:
+                    logger.warning(f"Failed to get state for {entity_id}: {resp.status}")
+                    return None
         except Exception as e:
             logger.error(f"Error getting state for {entity_id}: {e}")
             return None
 
+    async def get_all_states(self) -> Optional[Dict[str, Any]]:
+        """Get {entity_id: state} for every entity in one /api/states request"""
+        if self._watched is None and self._live_usable():
+            return self._live_states
+
+        cached = self._all_states_cache
+        if cached and time.monotonic() - cached[0] < self._cache_ttl:
+            return cached[1]
+
+        # Concurrent callers share one request; shielded so a cancelled caller doesn't cancel it
+        task = self._all_states_task
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_all_states())
+            self._all_states_task = task
+            task.add_done_callback(self._clear_all_states_task)
+        return await asyncio.shield(task)
+
+    def _clear_all_states_task(self, task: asyncio.Task):
+        if self._all_states_task is task:
+            self._all_states_task = None
+
+    async def _fetch_all_states(self) -> Optional[Dict[str, Any]]:
+        """Request /api/states and update the bulk cache"""
+        # Ask the server to skip the body if nothing changed (plain 200 if unsupported)
+        conditional_headers = {}
+        validators = self._all_states_validators
+        if validators:
+            etag, last_modified, _ = validators
+            if etag:
+                conditional_headers["If-None-Match"] = etag
+            if last_modified:
+                conditional_headers["If-Modified-Since"] = last_modified
+
+        try:
+            session = await self._get_session()
+            async with session.get(
+                f"{self.base_url}/api/states",
+                headers=conditional_headers,
+                timeout=STATE_TIMEOUT
+            ) as resp:
+                if resp.status == 304 and validators:
+                    all_states = validators[2]
+                    self._all_states_cache = (time.monotonic(), all_states)
+                    return all_states
+                elif resp.status == 200:
+                    if _decode_state_rows is not None:
+                        rows = _decode_state_rows(await resp.read())
+                        all_states = {row.entity_id: row.state for row in rows}
+                    else:
+                        payload = await resp.json(loads=_json_loads)
+                        all_states = {s['entity_id']: s.get('state', 'unknown') for s in payload}
+                    self._all_states_cache = (time.monotonic(), all_states)
+                    etag = resp.headers.get("ETag")
+                    last_modified = resp.headers.get("Last-Modified")
+                    if etag or last_modified:
+                        self._all_states_validators = (etag, last_modified, all_states)
+                    return all_states
+                else:
+                    logger.warning(f"Failed to get all states: {resp.status}")
+                    return None
+        except Exception as e:
+            logger.error(f"Error getting all states: {e}")
+            return None
+
     async def get_states(self, entity_ids: List[str]) -> Dict[str, Any]:
-        """Get states for multiple entities"""
+        """Get states for multiple entities (entities that don't exist or can't be read are left out)"""
+        if self._live_usable() and (self._watched is None or self._watched.issuperset(entity_ids)):
+            all_states = self._live_states
+        else:
+            all_states = await self.get_all_states()
+        if all_states is not None:
+            return {entity_id: all_states[entity_id] for entity_id in entity_ids if entity_id in all_states}
+
+        # Bulk endpoint failed - fall back to concurrent per-entity requests
+        results = await asyncio.gather(*(self.get_state(entity_id) for entity_id in entity_ids),
+                                       return_exceptions=True)
         states = {}
-        for entity_id in entity_ids:
-            state = await self.get_state(entity_id)
-            if state:
+        for entity_id, state in zip(entity_ids, results):
+            if state and not isinstance(state, BaseException):
                 states[entity_id] = state.get('state', 'unknown')
         return states
 
@@ -67,23 +387,64 @@ class HAClient:
         if data:
             payload.update(data)
 
+        # Prefer the open WebSocket - no HTTP request setup per call
+        if self._ws is not None and not self._ws.closed:
+            try:
+                return await self._ws_call_service(domain, service, payload)
+            except ConnectionError as e:
+                # Command never sent - safe to retry over REST
+                logger.debug("WebSocket service call unavailable (%s) - using REST", e)
+
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/api/services/{domain}/{service}",
-                    headers=self.headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as resp:
-                    if resp.status in [200, 201]:
-                        logger.info(f"Service called: {domain}.{service}")
-                        return True
-                    else:
-                        logger.error(f"Service call failed: {domain}.{service} - {resp.status}")
-                        return False
+            session = await self._get_session()
+            async with session.post(
+                f"{self.base_url}/api/services/{domain}/{service}",
+                json=payload,
+                timeout=SERVICE_TIMEOUT
+            ) as resp:
+                if resp.status in [200, 201]:
+                    logger.info("Service called: %s.%s", domain, service)
+                    return True
+                else:
+                    logger.error(f"Service call failed: {domain}.{service} - {resp.status}")
+                    return False
         except Exception as e:
             logger.error(f"Error calling service {domain}.{service}: {e}")
             return False
+        finally:
+            # The service may have changed any entity - don't serve pre-call reads
+            self.invalidate()
+
+    async def _ws_call_service(self, domain: str, service: str, payload: Dict[str, Any]) -> bool:
+        """Call a service over the WebSocket; raises ConnectionError if it can't be sent"""
+        ws = self._ws
+        msg_id = self._ws_next_id
+        self._ws_next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._ws_pending[msg_id] = future
+        try:
+            try:
+                await ws.send_json({"id": msg_id, "type": "call_service", "domain": domain,
+                                    "service": service, "service_data": payload}, dumps=_json_dumps)
+            except Exception as e:
+                raise ConnectionError(str(e)) from e
+
+            try:
+                result = await asyncio.wait_for(future, timeout=WS_SERVICE_TIMEOUT)
+            except (asyncio.TimeoutError, ConnectionError) as e:
+                # Sent but unconfirmed - don't retry over REST and risk running it twice
+                logger.error(f"Service call {domain}.{service} unconfirmed over WebSocket: {e!r}")
+                return False
+
+            if result.get('success'):
+                logger.info("Service called: %s.%s", domain, service)
+                return True
+            logger.error(f"Service call failed: {domain}.{service} - {result.get('error')}")
+            return False
+        finally:
+            self._ws_pending.pop(msg_id, None)
+            # The service may have changed any entity - don't serve pre-call reads
+            self.invalidate()
 
     async def send_notification(self, title: str, message: str,
                                notification_id: Optional[str] = None) -> bool:
@@ -117,15 +478,44 @@ class HAClient:
             data=data
         )
 
+    def queue_notification(self, title: str, message: str,
+                           notification_id: Optional[str] = None):
+        """Queue a persistent notification for the next flush_outbox()"""
+        data = {
+            "title": title,
+            "message": message
+        }
+        if notification_id:
+            data["notification_id"] = notification_id
+        self._outbox.append(("persistent_notification", "create", data))
+
+    def queue_logbook(self, name: str, message: str, entity_id: Optional[str] = None):
+        """Queue a logbook entry for the next flush_outbox()"""
+        data = {
+            "name": name,
+            "message": message
+        }
+        if entity_id:
+            data["entity_id"] = entity_id
+        self._outbox.append(("logbook", "log", data))
+
+    async def flush_outbox(self) -> int:
+        """Send all queued notifications/logbook entries concurrently; returns how many succeeded"""
+        if not self._outbox:
+            return 0
+        outbox, self._outbox = self._outbox, []
+        results = await asyncio.gather(*(self.call_service(domain, service, data=data)
+                                         for domain, service, data in outbox))
+        return sum(results)
+
     async def is_healthy(self) -> bool:
         """Check if HA API is accessible"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/api/",
-                    headers=self.headers,
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as resp:
-                    return resp.status == 200
+            session = await self._get_session()
+            async with session.get(
+                f"{self.base_url}/api/",
+                timeout=HEALTH_TIMEOUT
+            ) as resp:
+                return resp.status == 200
         except Exception:
             return False
@@ -8,30 +8,136 @@ Tier 3: Claude API (PAID) - handles ~5%
 """
 
 import os
+import re
+import sys
 import json
+import time
+import asyncio
+import hashlib
 import logging
 import aiohttp
 import yaml
+from collections import OrderedDict, deque
+from itertools import chain
 from typing import Optional, Dict, Any, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Aho-Corasick automaton finds every rule token in one pass (optional - plain substring scans otherwise)
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# orjson serializes prompt context several times faster (optional)
+try:
+    import orjson
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj, default=str).decode()
+except ImportError:
+    orjson = None
+
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj, separators=(',', ':'), default=str)
+
+# Decodes the first JSON object embedded in free-form model output
+_DECODER = json.JSONDecoder()
+
+# Pool valve switches, shared by the Tier 1 valve actions (constant - never mutate)
+_VALVE_SWITCHES = (
+    "switch.pool_valve_spa_suction_zwave",
+    "switch.pool_valve_spa_return_zwave",
+    "switch.pool_valve_pool_suction_zwave",
+    "switch.pool_valve_pool_return_zwave",
+    "switch.pool_valve_skimmer_zwave",
+    "switch.pool_valve_vacuum_zwave",
+)
+_ZWAVE_VALVE_ENTITIES = ("switch.pool_valve_power_24vac_zwave",) + _VALVE_SWITCHES
+_ACTION_PING_ZWAVE_VALVES = {"service": "zwave_js.ping", "target": {"entity_id": _ZWAVE_VALVE_ENTITIES}}
+_ACTION_TURN_OFF_VALVE_SWITCHES = {"service": "switch.turn_off", "target": {"entity_id": _VALVE_SWITCHES}}
+
+# Longest issue string interned by analyze()
+INTERN_MAX_LEN = 128
+
+# Most recent events included in a Tier 2/3 prompt
+PROMPT_MAX_EVENTS = 8
+
+# States kept in a Tier 2/3 prompt (when present) even if no issue names them:
+# active mode, pump, heater and water temperature are needed for any pool safety call
+PROMPT_CORE_STATES = (
+    "input_boolean.hot_tub_heat",
+    "input_boolean.pool_heat",
+    "input_boolean.pool_skimmer",
+    "input_boolean.pool_waterfall",
+    "input_boolean.pool_vacuum",
+    "input_boolean.hot_tub_empty",
+    "switch.pool_pump_zwave",
+    "switch.pool_heater_wifi",
+    "climate.pool_heater_wifi",
+    "sensor.pool_heater_wifi_temperature",
+)
+
 # Path to local permissions config
 PERMISSIONS_CONFIG_PATH = "/config/agent_permissions.yaml"
 
 
+# Tier 2 circuit breaker: after `failures` Ollama errors within `window` seconds,
+# skip Tier 2 for `open` seconds instead of waiting out a timeout on every call
+OLLAMA_BREAKER = {
+    "failures": 3,
+    "window": 600,
+    "open": 300,
+}
+OLLAMA_TIMEOUT = aiohttp.ClientTimeout(total=float(os.environ.get('OLLAMA_TIMEOUT', '20')))
+
+# Most Tier 2/3 requests in flight at once, across all agents (extra calls wait their turn)
+LLM_CONCURRENCY = max(1, int(os.environ.get('LLM_CONCURRENCY', '3')))
+
+# Tier 2/3 response cache: LRU capacity and entry lifetime (seconds)
+RESPONSE_CACHE_SIZE = 512
+RESPONSE_CACHE_TTL = float(os.environ.get('LLM_CACHE_TTL', '1800'))
+
+# Static part of every Tier 2/3 prompt. Sent as the system prompt so it is an
+# identical prefix on each call (Ollama KV reuse, Anthropic prompt caching).
+SYSTEM_PROMPT = """You are a home automation agent analyzing the current system state.
+
+Respond in this exact JSON format:
+{
+  "decision": "action_name or no_action",
+  "confidence": 0.0 to 1.0,
+  "reasoning": "brief explanation",
+  "action_required": true/false,
+  "action": {"service": "...", "target": {"entity_id": "..."}} or null,
+  "is_critical": true/false
+}
+
+Be conservative - only recommend actions when clearly needed."""
+
+# Claude system blocks - the static prompt marked cacheable
+CLAUDE_SYSTEM_BLOCKS = [
+    {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+]
+
+
+def _static_response(factory):
+    """Mark a rule response factory whose output ignores issues/states, so it can be built once"""
+    factory.static = True
+    return factory
+
+
 class DecisionTier(Enum):
     RULE_BASED = 1
     OLLAMA_LOCAL = 2
     CLAUDE_API = 3
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LLMResponse:
-    """Response from any tier of the LLM system"""
+    """Response from any tier of the LLM system (immutable - Tier 1 instances are shared)"""
     tier: DecisionTier
     decision: str
     confidence: float
@@ -45,22 +151,122 @@ class LLMResponse:
 class HybridLLM:
     """3-tier hybrid LLM system with Ollama primary, Claude fallback"""
 
+    __slots__ = (
+        'ollama_url', 'ollama_model', 'ollama_keep_alive',
+        'claude_api_key', 'claude_model', 'escalation_threshold', 'confirm_critical',
+        'hedge_agents', 'hedge_delay',
+        'tier1_calls', 'tier2_calls', 'tier3_calls', 'cache_hits',
+        '_resp_cache', '_session', '_ollama_failures', '_ollama_open_until', '_anthropic', 'permissions',
+        '_pool_rule_table', '_pool_token_matcher', '_dispatchers', '_dispatch_pool',
+        '_llm_sem', '_inflight',
+    )
+
     def __init__(self):
         self.ollama_url = os.environ.get('OLLAMA_URL', 'http://76e18fb5-ollama:11434')
         self.ollama_model = os.environ.get('OLLAMA_MODEL', 'llama3.2:1b')
+        # How long Ollama keeps the model loaded after a request (avoids cold reloads between cycles)
+        self.ollama_keep_alive = os.environ.get('OLLAMA_KEEP_ALIVE', '1h')
         self.claude_api_key = os.environ.get('CLAUDE_API_KEY', '')
         self.claude_model = os.environ.get('CLAUDE_MODEL', 'claude-sonnet-4-20250514')
         self.escalation_threshold = float(os.environ.get('ESCALATION_THRESHOLD', '0.7'))
         self.confirm_critical = os.environ.get('CONFIRM_CRITICAL', 'true').lower() == 'true'
+        # Agents whose Tier 2 answers usually escalate: Claude is started alongside a slow Ollama call
+        self.hedge_agents = frozenset(
+            a.strip() for a in os.environ.get('TIER3_HEDGE_AGENTS', 'security').split(',') if a.strip())
+        self.hedge_delay = float(os.environ.get('TIER3_HEDGE_DELAY', '2'))
 
         # Track API usage
         self.tier1_calls = 0
         self.tier2_calls = 0
         self.tier3_calls = 0
+        self.cache_hits = 0
+
+        # Tier 2/3 answers keyed on (agent, issues, hour): key -> (monotonic time stored, response)
+        self._resp_cache: OrderedDict[str, Tuple[float, LLMResponse]] = OrderedDict()
+
+        # Tier 2/3 analyses currently running, by cache key, so identical concurrent calls share one
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        # Shared keep-alive session to Ollama, created on first request
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        # Circuit breaker state (time.monotonic() based)
+        self._ollama_failures: deque = deque(maxlen=OLLAMA_BREAKER["failures"])
+        self._ollama_open_until = 0.0
+
+        # Caps concurrent Ollama/Claude requests when agents escalate in the same cycle
+        self._llm_sem = asyncio.Semaphore(LLM_CONCURRENCY)
+
+        # Async Claude client with its own keep-alive pool, created once (None without an API key)
+        self._anthropic = self._create_claude_client()
 
         # Load local permissions config
         self.permissions = self._load_permissions_config()
 
+        # Pool Tier 1 rules, built once
+        self._pool_rule_table = self._build_pool_rule_table()
+        self._pool_token_matcher = self._build_token_matcher(self._pool_rule_table)
+
+        # Tier 1 entry point per agent; table-driven agents get a generated dispatch function
+        self._dispatchers = {
+            'pool': self._pool_rules,
+            'lights': self._lights_rules,
+            'security': self._security_rules,
+            'climate': self._climate_rules,
+        }
+        self._dispatch_pool = self._compile_rule_table('pool', self._pool_rule_table)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared Ollama session, creating it if needed"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=20, keepalive_timeout=300)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _create_claude_client(self):
+        """Build the AsyncAnthropic client used by Tier 3, or None if unavailable"""
+        if not self.claude_api_key:
+            return None
+        try:
+            import anthropic
+            import httpx
+        except ImportError:
+            logger.warning("anthropic package not installed - Tier 3 disabled")
+            return None
+        return anthropic.AsyncAnthropic(
+            api_key=self.claude_api_key,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+        )
+
+    async def close(self):
+        """Close the shared Ollama session and the Claude client (call at shutdown)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._anthropic is not None:
+            await self._anthropic.close()
+            self._anthropic = None
+
+    async def warmup(self) -> bool:
+        """Load the Ollama model ahead of the first Tier 2 call (a prompt-less generate only loads it)"""
+        try:
+            session = await self._get_session()
+            async with session.post(
+                f"{self.ollama_url}/api/generate",
+                json={"model": self.ollama_model, "keep_alive": self.ollama_keep_alive},
+                timeout=aiohttp.ClientTimeout(total=300)
+            ) as resp:
+                if resp.status == 200:
+                    logger.info(f"Ollama model {self.ollama_model} loaded (keep_alive={self.ollama_keep_alive})")
+                    return True
+                logger.warning(f"Ollama warmup returned status {resp.status}")
+                return False
+        except Exception as e:
+            logger.warning(f"Ollama warmup failed: {e}")
+            return False
+
     def _load_permissions_config(self) -> Dict[str, Any]:
         """Load permissions from local config file"""
         try:
@@ -112,38 +318,85 @@ class HybridLLM:
         enabled, _ = self._get_rule_settings(agent_name, rule_name)
         return enabled
 
+    def analyze_sync(self, agent_name: str, context: Dict[str, Any]) -> Optional[LLMResponse]:
+        """
+        Tier 1 only, without an event loop.
+        Returns the rule-based decision, or None if the situation needs Tier 2/3.
+        """
+        # Lowercase the issues once; every Tier 1 rule function matches against this.
+        # Agents repeat the same issue strings cycle after cycle, so intern the short ones.
+        context['_issues_lc'] = tuple(
+            sys.intern(issue.lower()) if len(issue) <= INTERN_MAX_LEN else issue.lower()
+            for issue in context.get('issues', [])
+        )
+
+        # (hot-path log calls pass args so the message is only formatted when INFO is enabled)
+        tier1_result = self._tier1_rules(agent_name, context)
+        if tier1_result:
+            self.tier1_calls += 1
+            logger.info("[%s] Tier 1 handled: %s", agent_name, tier1_result.decision)
+        return tier1_result
+
     async def analyze(self, agent_name: str, context: Dict[str, Any]) -> LLMResponse:
         """
         Analyze a situation using the 3-tier system.
         Returns decision with confidence and recommended action.
         """
         # Tier 1: Rule-based checks (always runs first)
-        tier1_result = self._tier1_rules(agent_name, context)
+        tier1_result = self.analyze_sync(agent_name, context)
         if tier1_result:
-            self.tier1_calls += 1
-            logger.info(f"[{agent_name}] Tier 1 handled: {tier1_result.decision}")
             return tier1_result
 
-        # Tier 2: Ollama local LLM
-        tier2_result = await self._tier2_ollama(agent_name, context)
+        # Same issues seen recently - reuse the Tier 2/3 answer instead of calling a model
+        cache_key = self._cache_key(agent_name, context.get('issues', []))
+        cached = self._cache_get(cache_key)
+        if cached:
+            self.cache_hits += 1
+            logger.info("[%s] Cache hit: %s", agent_name, cached.decision)
+            return replace(cached, escalated=False)
+
+        # The same analysis is already running - wait for its answer instead of calling the models again
+        task = self._inflight.get(cache_key)
+        if task is not None:
+            logger.info("[%s] Joining in-flight analysis", agent_name)
+            return replace(await asyncio.shield(task), escalated=False)
+
+        task = asyncio.ensure_future(self._analyze_models(agent_name, context, cache_key))
+        self._inflight[cache_key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        # Shielded so a cancelled caller doesn't cancel the analysis others may be waiting on
+        return await asyncio.shield(task)
+
+    async def _analyze_models(self, agent_name: str, context: Dict[str, Any], cache_key: str) -> LLMResponse:
+        """Tiers 2 and 3 for a call that missed Tier 1 and the response cache"""
+        # Tier 2: Ollama local LLM (hedged with Tier 3 for agents that usually escalate)
+        tier3_result = None
+        tier3_tried = False
+        if self._anthropic is not None and agent_name in self.hedge_agents:
+            tier2_result, tier3_result, tier3_tried = await self._hedged_tier2_tier3(agent_name, context)
+        else:
+            tier2_result = await self._tier2_ollama(agent_name, context)
         if tier2_result and tier2_result.confidence >= self.escalation_threshold:
             self.tier2_calls += 1
-            logger.info(f"[{agent_name}] Tier 2 handled (confidence: {tier2_result.confidence:.2f})")
+            logger.info("[%s] Tier 2 handled (confidence: %.2f)", agent_name, tier2_result.confidence)
+            self._cache_put(cache_key, tier2_result)
             return tier2_result
 
         # Tier 3: Claude API (only if Tier 2 low confidence or failed)
-        if self.claude_api_key:
-            tier3_result = await self._tier3_claude(agent_name, context, tier2_result)
+        if self._anthropic is not None:
+            if not tier3_tried:
+                tier3_result = await self._tier3_claude(agent_name, context, tier2_result)
             if tier3_result:
                 self.tier3_calls += 1
-                tier3_result.escalated = True
-                logger.info(f"[{agent_name}] Tier 3 Claude handled")
+                tier3_result = replace(tier3_result, escalated=True)
+                logger.info("[%s] Tier 3 Claude handled", agent_name)
+                if tier3_result.confidence >= self.escalation_threshold:
+                    self._cache_put(cache_key, tier3_result)
                 return tier3_result
 
         # Fallback: return Tier 2 result even if low confidence
         if tier2_result:
-            tier2_result.reasoning += " (Low confidence, Claude unavailable)"
-            return tier2_result
+            return replace(tier2_result, reasoning=tier2_result.reasoning + " (Low confidence, Claude unavailable)")
 
         # Ultimate fallback
         return LLMResponse(
@@ -154,6 +407,66 @@ class HybridLLM:
             action_required=False
         )
 
+    async def _hedged_tier2_tier3(self, agent_name: str, context: Dict[str, Any]
+                                  ) -> Tuple[Optional[LLMResponse], Optional[LLMResponse], bool]:
+        """
+        Run Tier 2, starting Tier 3 as well if Ollama hasn't answered within hedge_delay.
+        The first satisfactory answer wins and the other call is cancelled.
+        Returns (tier2_result, tier3_result, tier3_tried).
+        """
+        tier2_task = asyncio.create_task(self._tier2_ollama(agent_name, context))
+        tier3_task = None
+        try:
+            done, _ = await asyncio.wait({tier2_task}, timeout=self.hedge_delay)
+            if done:
+                # Ollama answered quickly - escalate sequentially as usual
+                return tier2_task.result(), None, False
+
+            logger.info(f"[{agent_name}] Tier 2 slow - starting Tier 3 in parallel")
+            tier3_task = asyncio.create_task(self._tier3_claude(agent_name, context, None))
+            tier2_result = tier3_result = None
+            pending = {tier2_task, tier3_task}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if tier2_task in done:
+                    tier2_result = tier2_task.result()
+                    if tier2_result and tier2_result.confidence >= self.escalation_threshold:
+                        break
+                if tier3_task in done:
+                    tier3_result = tier3_task.result()
+                    if tier3_result:
+                        break
+            return tier2_result, tier3_result, True
+        finally:
+            for task in (tier2_task, tier3_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def _cache_key(self, agent_name: str, issues) -> str:
+        """Order-independent key for an agent's issue set, bucketed by local hour"""
+        bucket = str(time.localtime().tm_hour)
+        raw = agent_name + "|" + "|".join(sorted(issues)) + "|" + bucket
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[LLMResponse]:
+        """Return a fresh cached response (refreshing its LRU position), or None"""
+        entry = self._resp_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at > RESPONSE_CACHE_TTL:
+            del self._resp_cache[key]
+            return None
+        self._resp_cache.move_to_end(key)
+        return response
+
+    def _cache_put(self, key: str, response: LLMResponse):
+        """Store a response, evicting the least recently used entry when full"""
+        self._resp_cache[key] = (time.monotonic(), response)
+        self._resp_cache.move_to_end(key)
+        if len(self._resp_cache) > RESPONSE_CACHE_SIZE:
+            self._resp_cache.popitem(last=False)
+
     def _tier1_rules(self, agent_name: str, context: Dict[str, Any]) -> Optional[LLMResponse]:
         """
         Tier 1: Simple rule-based decisions.
@@ -161,375 +474,428 @@ class HybridLLM:
         """
         issues = context.get('issues', [])
         states = context.get('states', {})
+        issues_lc = context.get('_issues_lc')
+        if issues_lc is None:
+            issues_lc = tuple(issue.lower() for issue in issues)
 
-        # Pool agent rules
-        if agent_name == 'pool':
-            return self._pool_rules(issues, states)
-
-        # Lights agent rules
-        elif agent_name == 'lights':
-            return self._lights_rules(issues, states)
-
-        # Security agent rules
-        elif agent_name == 'security':
-            return self._security_rules(issues, states)
-
-        # Climate agent rules
-        elif agent_name == 'climate':
-            return self._climate_rules(issues, states)
-
-        return None
+        dispatch = self._dispatchers.get(agent_name)
+        if dispatch is None:
+            return None
+        return dispatch(issues, issues_lc, states)
 
-    def _pool_rules(self, issues: list, states: dict) -> Optional[LLMResponse]:
+    def _build_pool_rule_table(self) -> list:
+        """
+        Pool Tier 1 rules in priority order, checked first-match-wins.
+        Format: (require, exclude, rule_name, factory)
+          require   - tuple of token groups; every group needs at least one token present
+          exclude   - tokens that must all be absent
+          rule_name - permissions rule gating the response (None = monitoring only, always on)
+          factory   - builds the response from (issues_lc, states)
+        """
+        return [
+            # ========== CRITICAL SAFETY RULES (Act immediately) ==========
+            # Rule 1: EMERGENCY - Overheat protection (>105°F)
+            ((('overheat',), ('105',)), (), 'emergency_overheat_stop', self._resp_emergency_overheat_stop),
+            # Rule 2: CRITICAL - Heating mode with wrong valve position (drainage risk)
+            ((('hot tub heat on but valve trackers show wrong position',),), (),
+             'stop_heating_wrong_valves', self._resp_stop_heating_wrong_valves),
+            # Rule 3: CRITICAL - Pump not running during heating mode
+            ((('heating mode active but pump is off',),), (), 'pump_on_during_heating', self._resp_pump_on_during_heating),
+
+            # ========== MEDIUM PRIORITY RULES (Auto-fix whitelisted) ==========
+            # Rule 4: Stuck sequence lock (no mode active)
+            ((('sequence lock stuck on',),), (), 'clear_stuck_sequence_lock', self._resp_clear_stuck_sequence_lock),
+            # Rule 5: Stuck pool_action flag (no mode active)
+            ((('pool action flag stuck on',),), (), 'clear_stuck_action_flag', self._resp_clear_stuck_action_flag),
+            # Rule 6: Skimmer + Waterfall conflict
+            ((('both skimmer and waterfall active',),), (), 'resolve_mode_conflict', self._resp_resolve_mode_conflict),
+            # Rule 7: Orphan pump during quiet hours
+            ((('pump running during quiet hours',), ('orphan',)), (), 'pump_off_orphan', self._resp_pump_off_orphan),
+            # Rule 8: Valve tracker mismatch (sync trackers)
+            # Note: This handles the WARNING level mismatch, not the CRITICAL drainage risk one
+            ((('valve trackers',), ('wrong',)), ('drainage',), 'sync_valve_trackers', self._resp_sync_valve_trackers),
+            # Rule 9: Z-Wave valves unavailable (3+) - attempt recovery
+            ((('z-wave valves unavailable',), ('z-wave issue',)), (), 'zwave_recovery', self._resp_zwave_recovery),
+            # Rule 10: Single Z-Wave valve unavailable - ping it
+            ((('z-wave valve(s) unavailable',),), ('z-wave issue',), 'zwave_ping', self._resp_zwave_ping),
+            # Rule 11: Program mismatch - restart current mode to fix
+            ((('program_mismatch', 'program mismatch'),), (),
+             'restart_mode_fix_mismatch', self._resp_restart_mode_fix_mismatch),
+            # Rule 12: Mode timeout - stop the timed-out mode (only hot_tub_empty has a timeout)
+            ((('mode_timeout', 'mode timeout'), ('hot_tub_empty',)), (),
+             'stop_timed_out_mode', self._resp_stop_timed_out_mode),
+
+            # ========== STARTUP SEQUENCE MONITORING RULES ==========
+            # Rule 13: Startup timeout - clear sequence lock
+            ((('startup_timeout',),), (), 'clear_startup_timeout', self._resp_clear_startup_timeout),
+            # Rule 14: 24VAC power stuck ON - turn it off to protect valve motors
+            ((('startup_issue',), ('24vac',)), (), 'turn_off_24vac', self._resp_turn_off_24vac),
+            # Rule 15: Valve switch stuck ON - turn off all valve switches
+            ((('valve_stuck',),), (), 'turn_off_stuck_valve', self._resp_turn_off_stuck_valve),
+            # Rule 16: 24VAC power ON during steady-state - turn it off
+            ((('24vac_on_steady_state',),), (), 'turn_off_24vac_steady_state', self._resp_turn_off_24vac_steady_state),
+
+            # ========== MONITORING ONLY (No action) ==========
+            # Sensor failure - just monitor, don't try to fix
+            ((('sensor failure',),), (), None, self._resp_sensor_failure_monitor),
+            # High temperature warning (but not overheat)
+            ((('temperature high',),), ('overheat',), None, self._resp_high_temp_monitor),
+        ]
+
+    @staticmethod
+    def _build_token_matcher(rule_table: list):
+        """
+        Compile every require/exclude token of a rule table into one matcher.
+        Returns collect(issues_lc) -> set of tokens present in any issue.
+        Uses an Aho-Corasick automaton when available, else one regex alternation.
+        """
+        tokens = sorted({sys.intern(token) for require, exclude, _, _ in rule_table
+                         for token in chain(chain.from_iterable(require), exclude)},
+                        key=len, reverse=True)
+
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for token in tokens:
+                automaton.add_word(token, token)
+            automaton.make_automaton()
+            matcher_iter = automaton.iter
+
+            def collect(issues_lc: Tuple[str, ...]) -> set:
+                return {token for issue in issues_lc for _, token in matcher_iter(issue)}
+            return collect
+
+        # Zero-width lookahead tries every position, longest token first. A shorter
+        # token sharing that start is a substring of the match, so it is added from
+        # the precomputed containment map.
+        findall = re.compile("(?=(" + "|".join(map(re.escape, tokens)) + "))").findall
+        contained = {token: frozenset(t for t in tokens if t in token) for token in tokens}
+
+        def collect(issues_lc: Tuple[str, ...]) -> set:
+            found = set()
+            for match in set(findall("\n".join(issues_lc))):
+                found |= contained[match]
+            return found
+        return collect
+
+    def _compile_rule_table(self, agent_name: str, rule_table: list):
+        """
+        Generate one straight-line function for a rule table:
+        _dispatch(present, issues_lc, states) -> response, or None if no rule matched / the rule is disabled
+        """
+        namespace = {'_enabled': self._is_rule_enabled}
+        lines = [f"def _dispatch_{agent_name}(present, issues_lc, states):"]
+        for i, (require, exclude, rule_name, factory) in enumerate(rule_table):
+            if getattr(factory, 'static', False):
+                # Permissions are fixed after __init__, so the response is too - build it now
+                namespace[f'_f{i}'] = factory((), {})
+                call = f"_f{i}"
+            else:
+                namespace[f'_f{i}'] = factory
+                call = f"_f{i}(issues_lc, states)"
+            conditions = ["(" + " or ".join(f"present({token!r})" for token in group) + ")"
+                          for group in require]
+            conditions.extend(f"not present({token!r})" for token in exclude)
+            lines.append(f"    if {' and '.join(conditions)}:")
+            if rule_name:
+                # Rule disabled - escalate to LLM
+                lines.append(f"        if not _enabled({agent_name!r}, {rule_name!r}): return None")
+            lines.append(f"        return {call}")
+        lines.append("    return None")
+        exec(compile("\n".join(lines), f"<tier1 {agent_name} rules>", "exec"), namespace)
+        return namespace[f'_dispatch_{agent_name}']
+
+    def _pool_rules(self, issues: list, issues_lc: Tuple[str, ...], states: dict) -> Optional[LLMResponse]:
         """Pool-specific Tier 1 rules - comprehensive auto-fix"""
 
-        issues_str = ' '.join(issues).lower()
+        # One pass collects every token present; rules then test set membership
+        present = self._pool_token_matcher(issues_lc).__contains__
 
-        # ========== CRITICAL SAFETY RULES (Act immediately) ==========
+        result = self._dispatch_pool(present, issues_lc, states)
+        if result is not None:
+            return result
 
-        # Rule 1: EMERGENCY - Overheat protection (>105°F)
-        if 'overheat' in issues_str and '105' in issues_str:
-            if not self._is_rule_enabled('pool', 'emergency_overheat_stop'):
-                return None  # Rule disabled, escalate to LLM
-            temp = states.get('sensor.pool_heater_wifi_temperature', 'unknown')
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="emergency_overheat_stop",
-                confidence=1.0,
-                reasoning=f"EMERGENCY: Water temperature {temp}°F exceeds 105°F safety limit - running emergency stop",
-                action_required=True,
-                action={
-                    "service": "script.turn_on",
-                    "target": {"entity_id": "script.pool_emergency_all_stop"}
-                },
-                needs_confirmation=self._should_confirm('pool', 'emergency_overheat_stop')
-            )
-
-        # Rule 2: CRITICAL - Heating mode with wrong valve position (drainage risk)
-        if 'hot tub heat on but valve trackers show wrong position' in issues_str:
-            if not self._is_rule_enabled('pool', 'stop_heating_wrong_valves'):
-                return None
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="stop_heating_wrong_valves",
-                confidence=1.0,
-                reasoning="CRITICAL: Hot tub heating with valves in wrong position - drainage risk! Stopping heating mode.",
-                action_required=True,
-                action={
-                    "service": "input_boolean.turn_off",
-                    "target": {"entity_id": "input_boolean.hot_tub_heat"}
-                },
-                needs_confirmation=self._should_confirm('pool', 'stop_heating_wrong_valves')
-            )
+        # ========== NO ISSUES ==========
 
-        # Rule 3: CRITICAL - Pump not running during heating mode
-        if 'heating mode active but pump is off' in issues_str:
-            if not self._is_rule_enabled('pool', 'pump_on_during_heating'):
-                return None
+        if not issues:
             return LLMResponse(
                 tier=DecisionTier.RULE_BASED,
-                decision="pump_on_during_heating",
+                decision="all_normal",
                 confidence=1.0,
-                reasoning="CRITICAL: Heating mode active but pump is OFF - turning pump ON to prevent dry heater damage",
-                action_required=True,
-                action={
-                    "service": "switch.turn_on",
-                    "target": {"entity_id": "switch.pool_pump_zwave"}
-                },
-                needs_confirmation=self._should_confirm('pool', 'pump_on_during_heating')
+                reasoning="All pool systems operating normally",
+                action_required=False
             )
 
-        # ========== MEDIUM PRIORITY RULES (Auto-fix whitelisted) ==========
+        # Complex issues - escalate to Tier 2
+        return None
 
-        # Rule 4: Stuck sequence lock (no mode active)
-        if 'sequence lock stuck on' in issues_str:
-            if not self._is_rule_enabled('pool', 'clear_stuck_sequence_lock'):
-                return None
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="clear_stuck_sequence_lock",
-                confidence=1.0,
-                reasoning="Sequence lock is stuck ON with no mode active - clearing lock",
-                action_required=True,
-                action={
-                    "service": "input_boolean.turn_off",
-                    "target": {"entity_id": "input_boolean.pool_sequence_lock"}
-                },
-                needs_confirmation=self._should_confirm('pool', 'clear_stuck_sequence_lock')
-            )
+    # ---------- Pool rule responses ----------
 
-        # Rule 5: Stuck pool_action flag (no mode active)
-        if 'pool action flag stuck on' in issues_str:
-            if not self._is_rule_enabled('pool', 'clear_stuck_action_flag'):
-                return None
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="clear_stuck_action_flag",
-                confidence=1.0,
-                reasoning="Pool action flag is stuck ON with no mode active - clearing flag",
-                action_required=True,
-                action={
-                    "service": "input_boolean.turn_off",
-                    "target": {"entity_id": "input_boolean.pool_action"}
-                },
-                needs_confirmation=self._should_confirm('pool', 'clear_stuck_action_flag')
-            )
-
-        # Rule 6: Skimmer + Waterfall conflict
-        if 'both skimmer and waterfall active' in issues_str:
-            if not self._is_rule_enabled('pool', 'resolve_mode_conflict'):
-                return None
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="resolve_mode_conflict",
-                confidence=1.0,
-                reasoning="Both skimmer and waterfall are active (conflict) - turning off waterfall, keeping skimmer",
-                action_required=True,
-                action={
-                    "service": "input_boolean.turn_off",
-                    "target": {"entity_id": "input_boolean.pool_waterfall"}
-                },
-                needs_confirmation=self._should_confirm('pool', 'resolve_mode_conflict')
-            )
+    def _resp_emergency_overheat_stop(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        temp = states.get('sensor.pool_heater_wifi_temperature', 'unknown')
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="emergency_overheat_stop",
+            confidence=1.0,
+            reasoning=f"EMERGENCY: Water temperature {temp}°F exceeds 105°F safety limit - running emergency stop",
+            action_required=True,
+            action={
+                "service": "script.turn_on",
+                "target": {"entity_id": "script.pool_emergency_all_stop"}
+            },
+            needs_confirmation=self._should_confirm('pool', 'emergency_overheat_stop')
+        )
 
-        # Rule 7: Orphan pump during quiet hours
-        if 'pump running during quiet hours' in issues_str and 'orphan' in issues_str:
-            if not self._is_rule_enabled('pool', 'pump_off_orphan'):
-                return None
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="pump_off_orphan",
-                confidence=1.0,
-                reasoning="Pump running during quiet hours (6PM-8AM) with no mode active - turning off orphan pump",
-                action_required=True,
-                action={
-                    "service": "switch.turn_off",
-                    "target": {"entity_id": "switch.pool_pump_zwave"}
-                },
-                needs_confirmation=self._should_confirm('pool', 'pump_off_orphan')
-            )
+    @_static_response
+    def _resp_stop_heating_wrong_valves(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="stop_heating_wrong_valves",
+            confidence=1.0,
+            reasoning="CRITICAL: Hot tub heating with valves in wrong position - drainage risk! Stopping heating mode.",
+            action_required=True,
+            action={
+                "service": "input_boolean.turn_off",
+                "target": {"entity_id": "input_boolean.hot_tub_heat"}
+            },
+            needs_confirmation=self._should_confirm('pool', 'stop_heating_wrong_valves')
+        )
 
-        # Rule 8: Valve tracker mismatch (sync trackers)
-        # Note: This handles the WARNING level mismatch, not the CRITICAL drainage risk one
-        if 'valve trackers' in issues_str and 'wrong' in issues_str and 'drainage' not in issues_str:
-            if not self._is_rule_enabled('pool', 'sync_valve_trackers'):
-                return None
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="sync_valve_trackers",
-                confidence=0.95,
-                reasoning="Valve trackers don't match expected positions - syncing trackers to current mode",
-                action_required=True,
-                action={
-                    "service": "script.turn_on",
-                    "target": {"entity_id": "script.pool_valve_tracker_sync_to_mode"}
-                },
-                needs_confirmation=self._should_confirm('pool', 'sync_valve_trackers')
-            )
+    @_static_response
+    def _resp_pump_on_during_heating(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="pump_on_during_heating",
+            confidence=1.0,
+            reasoning="CRITICAL: Heating mode active but pump is OFF - turning pump ON to prevent dry heater damage",
+            action_required=True,
+            action={
+                "service": "switch.turn_on",
+                "target": {"entity_id": "switch.pool_pump_zwave"}
+            },
+            needs_confirmation=self._should_confirm('pool', 'pump_on_during_heating')
+        )
 
-        # Rule 9: Z-Wave valves unavailable (3+) - attempt recovery
-        if 'z-wave valves unavailable' in issues_str and 'z-wave issue' in issues_str:
-            if not self._is_rule_enabled('pool', 'zwave_recovery'):
-                return None
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="zwave_recovery",
-                confidence=0.9,
-                reasoning="Multiple Z-Wave valves unavailable - attempting Z-Wave integration reload",
-                action_required=True,
-                action={
-                    "service": "homeassistant.reload_config_entry",
-                    "data": {"entry_id": "zwave_js"}
-                },
-                needs_confirmation=self._should_confirm('pool', 'zwave_recovery')
-            )
+    @_static_response
+    def _resp_clear_stuck_sequence_lock(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="clear_stuck_sequence_lock",
+            confidence=1.0,
+            reasoning="Sequence lock is stuck ON with no mode active - clearing lock",
+            action_required=True,
+            action={
+                "service": "input_boolean.turn_off",
+                "target": {"entity_id": "input_boolean.pool_sequence_lock"}
+            },
+            needs_confirmation=self._should_confirm('pool', 'clear_stuck_sequence_lock')
+        )
 
-        # Rule 10: Single Z-Wave valve unavailable - ping it
-        if 'z-wave valve(s) unavailable' in issues_str and 'z-wave issue' not in issues_str:
-            if not self._is_rule_enabled('pool', 'zwave_ping'):
-                return None
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="zwave_ping",
-                confidence=0.85,
-                reasoning="Z-Wave valve(s) unavailable - attempting to ping devices",
-                action_required=True,
-                action={
-                    "service": "zwave_js.ping",
-                    "target": {"entity_id": [
-                        "switch.pool_valve_power_24vac_zwave",
-                        "switch.pool_valve_spa_suction_zwave",
-                        "switch.pool_valve_spa_return_zwave",
-                        "switch.pool_valve_pool_suction_zwave",
-                        "switch.pool_valve_pool_return_zwave",
-                        "switch.pool_valve_skimmer_zwave",
-                        "switch.pool_valve_vacuum_zwave"
-                    ]}
-                },
-                needs_confirmation=self._should_confirm('pool', 'zwave_ping')
-            )
+    @_static_response
+    def _resp_clear_stuck_action_flag(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="clear_stuck_action_flag",
+            confidence=1.0,
+            reasoning="Pool action flag is stuck ON with no mode active - clearing flag",
+            action_required=True,
+            action={
+                "service": "input_boolean.turn_off",
+                "target": {"entity_id": "input_boolean.pool_action"}
+            },
+            needs_confirmation=self._should_confirm('pool', 'clear_stuck_action_flag')
+        )
 
-        # Rule 11: Program mismatch - restart current mode to fix
-        if 'program_mismatch' in issues_str or 'program mismatch' in issues_str:
-            if not self._is_rule_enabled('pool', 'restart_mode_fix_mismatch'):
-                return None
-            mode_name = "active mode"
-            for mode in ['hot_tub_heat', 'pool_heat', 'pool_skimmer', 'pool_waterfall', 'pool_vacuum', 'hot_tub_empty']:
-                if mode in issues_str:
-                    mode_name = mode.replace('_', ' ')
-                    break
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="restart_mode_fix_mismatch",
-                confidence=1.0,
-                reasoning=f"Program mismatch detected in {mode_name} - restarting mode to correct equipment states",
-                action_required=True,
-                action={
-                    "service": "script.turn_on",
-                    "target": {"entity_id": "script.pool_system_force_restart_current_mode"}
-                },
-                needs_confirmation=self._should_confirm('pool', 'restart_mode_fix_mismatch')
-            )
+    @_static_response
+    def _resp_resolve_mode_conflict(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="resolve_mode_conflict",
+            confidence=1.0,
+            reasoning="Both skimmer and waterfall are active (conflict) - turning off waterfall, keeping skimmer",
+            action_required=True,
+            action={
+                "service": "input_boolean.turn_off",
+                "target": {"entity_id": "input_boolean.pool_waterfall"}
+            },
+            needs_confirmation=self._should_confirm('pool', 'resolve_mode_conflict')
+        )
 
-        # Rule 12: Mode timeout - stop the timed-out mode
-        if 'mode_timeout' in issues_str or 'mode timeout' in issues_str:
-            if 'hot_tub_empty' in issues_str:
-                if not self._is_rule_enabled('pool', 'stop_timed_out_mode'):
-                    return None
-                return LLMResponse(
-                    tier=DecisionTier.RULE_BASED,
-                    decision="stop_timed_out_mode",
-                    confidence=1.0,
-                    reasoning="Hot Tub Empty mode has exceeded 6 minute timeout - stopping mode to prevent damage",
-                    action_required=True,
-                    action={
-                        "service": "input_boolean.turn_off",
-                        "target": {"entity_id": "input_boolean.hot_tub_empty"}
-                    },
-                    needs_confirmation=self._should_confirm('pool', 'stop_timed_out_mode')
-                )
+    @_static_response
+    def _resp_pump_off_orphan(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="pump_off_orphan",
+            confidence=1.0,
+            reasoning="Pump running during quiet hours (6PM-8AM) with no mode active - turning off orphan pump",
+            action_required=True,
+            action={
+                "service": "switch.turn_off",
+                "target": {"entity_id": "switch.pool_pump_zwave"}
+            },
+            needs_confirmation=self._should_confirm('pool', 'pump_off_orphan')
+        )
 
-        # ========== STARTUP SEQUENCE MONITORING RULES ==========
+    @_static_response
+    def _resp_sync_valve_trackers(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="sync_valve_trackers",
+            confidence=0.95,
+            reasoning="Valve trackers don't match expected positions - syncing trackers to current mode",
+            action_required=True,
+            action={
+                "service": "script.turn_on",
+                "target": {"entity_id": "script.pool_valve_tracker_sync_to_mode"}
+            },
+            needs_confirmation=self._should_confirm('pool', 'sync_valve_trackers')
+        )
 
-        # Rule 13: Startup timeout - clear sequence lock
-        if 'startup_timeout' in issues_str:
-            if not self._is_rule_enabled('pool', 'clear_startup_timeout'):
-                return None
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="clear_startup_timeout",
-                confidence=1.0,
-                reasoning="Startup sequence has timed out (>5 min) - clearing sequence lock to unblock system",
-                action_required=True,
-                action={
-                    "service": "input_boolean.turn_off",
-                    "target": {"entity_id": "input_boolean.pool_sequence_lock"}
-                },
-                needs_confirmation=self._should_confirm('pool', 'clear_startup_timeout')
-            )
+    @_static_response
+    def _resp_zwave_recovery(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="zwave_recovery",
+            confidence=0.9,
+            reasoning="Multiple Z-Wave valves unavailable - attempting Z-Wave integration reload",
+            action_required=True,
+            action={
+                "service": "homeassistant.reload_config_entry",
+                "data": {"entry_id": "zwave_js"}
+            },
+            needs_confirmation=self._should_confirm('pool', 'zwave_recovery')
+        )
 
-        # Rule 14: 24VAC power stuck ON - turn it off to protect valve motors
-        if 'startup_issue' in issues_str and '24vac' in issues_str:
-            if not self._is_rule_enabled('pool', 'turn_off_24vac'):
-                return None
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="turn_off_24vac",
-                confidence=1.0,
-                reasoning="24VAC power has been ON too long - turning off to prevent valve motor damage",
-                action_required=True,
-                action={
-                    "service": "switch.turn_off",
-                    "target": {"entity_id": "switch.pool_valve_power_24vac_zwave"}
-                },
-                needs_confirmation=self._should_confirm('pool', 'turn_off_24vac')
-            )
+    @_static_response
+    def _resp_zwave_ping(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="zwave_ping",
+            confidence=0.85,
+            reasoning="Z-Wave valve(s) unavailable - attempting to ping devices",
+            action_required=True,
+            action=_ACTION_PING_ZWAVE_VALVES,
+            needs_confirmation=self._should_confirm('pool', 'zwave_ping')
+        )
 
-        # Rule 15: Valve switch stuck ON - turn off all valve switches
-        if 'valve_stuck' in issues_str:
-            if not self._is_rule_enabled('pool', 'turn_off_stuck_valve'):
-                return None
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="turn_off_stuck_valve",
-                confidence=1.0,
-                reasoning="Valve switch has been ON too long (>60s) - turning off all valve switches to prevent motor damage",
-                action_required=True,
-                action={
-                    "service": "switch.turn_off",
-                    "target": {"entity_id": [
-                        "switch.pool_valve_spa_suction_zwave",
-                        "switch.pool_valve_spa_return_zwave",
-                        "switch.pool_valve_pool_suction_zwave",
-                        "switch.pool_valve_pool_return_zwave",
-                        "switch.pool_valve_skimmer_zwave",
-                        "switch.pool_valve_vacuum_zwave"
-                    ]}
-                },
-                needs_confirmation=self._should_confirm('pool', 'turn_off_stuck_valve')
-            )
+    def _resp_restart_mode_fix_mismatch(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        mode_name = "active mode"
+        for mode in ['hot_tub_heat', 'pool_heat', 'pool_skimmer', 'pool_waterfall', 'pool_vacuum', 'hot_tub_empty']:
+            if any(mode in issue for issue in issues_lc):
+                mode_name = mode.replace('_', ' ')
+                break
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="restart_mode_fix_mismatch",
+            confidence=1.0,
+            reasoning=f"Program mismatch detected in {mode_name} - restarting mode to correct equipment states",
+            action_required=True,
+            action={
+                "service": "script.turn_on",
+                "target": {"entity_id": "script.pool_system_force_restart_current_mode"}
+            },
+            needs_confirmation=self._should_confirm('pool', 'restart_mode_fix_mismatch')
+        )
 
-        # Rule 16: 24VAC power ON during steady-state - turn it off
-        # NOTE: Valve direction switches stay ON to indicate position - that's normal!
-        # Only the 24VAC power should be OFF during steady-state.
-        if '24vac_on_steady_state' in issues_str:
-            if not self._is_rule_enabled('pool', 'turn_off_24vac_steady_state'):
-                return None
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="turn_off_24vac_steady_state",
-                confidence=1.0,
-                reasoning="24VAC power is ON during steady-state (no startup in progress) - turning off to stop unnecessary valve actuation",
-                action_required=True,
-                action={
-                    "service": "switch.turn_off",
-                    "target": {"entity_id": "switch.pool_valve_power_24vac_zwave"}
-                },
-                needs_confirmation=self._should_confirm('pool', 'turn_off_24vac_steady_state')
-            )
+    @_static_response
+    def _resp_stop_timed_out_mode(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="stop_timed_out_mode",
+            confidence=1.0,
+            reasoning="Hot Tub Empty mode has exceeded 6 minute timeout - stopping mode to prevent damage",
+            action_required=True,
+            action={
+                "service": "input_boolean.turn_off",
+                "target": {"entity_id": "input_boolean.hot_tub_empty"}
+            },
+            needs_confirmation=self._should_confirm('pool', 'stop_timed_out_mode')
+        )
 
-        # ========== MONITORING ONLY (No action) ==========
+    @_static_response
+    def _resp_clear_startup_timeout(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="clear_startup_timeout",
+            confidence=1.0,
+            reasoning="Startup sequence has timed out (>5 min) - clearing sequence lock to unblock system",
+            action_required=True,
+            action={
+                "service": "input_boolean.turn_off",
+                "target": {"entity_id": "input_boolean.pool_sequence_lock"}
+            },
+            needs_confirmation=self._should_confirm('pool', 'clear_startup_timeout')
+        )
 
-        # Sensor failure - just monitor, don't try to fix
-        if 'sensor failure' in issues_str:
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="sensor_failure_monitor",
-                confidence=1.0,
-                reasoning="Temperature sensor failure detected - heating is blocked by existing automations. Monitoring only.",
-                action_required=False
-            )
+    @_static_response
+    def _resp_turn_off_24vac(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="turn_off_24vac",
+            confidence=1.0,
+            reasoning="24VAC power has been ON too long - turning off to prevent valve motor damage",
+            action_required=True,
+            action={
+                "service": "switch.turn_off",
+                "target": {"entity_id": "switch.pool_valve_power_24vac_zwave"}
+            },
+            needs_confirmation=self._should_confirm('pool', 'turn_off_24vac')
+        )
 
-        # High temperature warning (but not overheat)
-        if 'temperature high' in issues_str and 'overheat' not in issues_str:
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="high_temp_monitor",
-                confidence=1.0,
-                reasoning="Temperature is high but below critical threshold - monitoring",
-                action_required=False
-            )
+    @_static_response
+    def _resp_turn_off_stuck_valve(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="turn_off_stuck_valve",
+            confidence=1.0,
+            reasoning="Valve switch has been ON too long (>60s) - turning off all valve switches to prevent motor damage",
+            action_required=True,
+            action=_ACTION_TURN_OFF_VALVE_SWITCHES,
+            needs_confirmation=self._should_confirm('pool', 'turn_off_stuck_valve')
+        )
 
-        # ========== NO ISSUES ==========
+    @_static_response
+    def _resp_turn_off_24vac_steady_state(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        # NOTE: Valve direction switches stay ON to indicate position - that's normal!
+        # Only the 24VAC power should be OFF during steady-state.
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="turn_off_24vac_steady_state",
+            confidence=1.0,
+            reasoning="24VAC power is ON during steady-state (no startup in progress) - turning off to stop unnecessary valve actuation",
+            action_required=True,
+            action={
+                "service": "switch.turn_off",
+                "target": {"entity_id": "switch.pool_valve_power_24vac_zwave"}
+            },
+            needs_confirmation=self._should_confirm('pool', 'turn_off_24vac_steady_state')
+        )
 
-        if not issues:
-            return LLMResponse(
-                tier=DecisionTier.RULE_BASED,
-                decision="all_normal",
-                confidence=1.0,
-                reasoning="All pool systems operating normally",
-                action_required=False
-            )
+    @_static_response
+    def _resp_sensor_failure_monitor(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="sensor_failure_monitor",
+            confidence=1.0,
+            reasoning="Temperature sensor failure detected - heating is blocked by existing automations. Monitoring only.",
+            action_required=False
+        )
 
-        # Complex issues - escalate to Tier 2
-        return None
+    @_static_response
+    def _resp_high_temp_monitor(self, issues_lc: Tuple[str, ...], states: dict) -> LLMResponse:
+        return LLMResponse(
+            tier=DecisionTier.RULE_BASED,
+            decision="high_temp_monitor",
+            confidence=1.0,
+            reasoning="Temperature is high but below critical threshold - monitoring",
+            action_required=False
+        )
 
-    def _lights_rules(self, issues: list, states: dict) -> Optional[LLMResponse]:
+    def _lights_rules(self, issues: list, issues_lc: Tuple[str, ...], states: dict) -> Optional[LLMResponse]:
         """Lights-specific Tier 1 rules"""
 
         # Simple: Exterior lights on during day
-        for issue in issues:
-            if 'exterior_lights_on_during_day' in str(issue):
+        for issue in issues_lc:
+            if 'exterior_lights_on_during_day' in issue:
                 if not self._is_rule_enabled('lights', 'turn_off_exterior_lights'):
                     return None
                 return LLMResponse(
@@ -557,7 +923,7 @@ class HybridLLM:
 
         return None
 
-    def _security_rules(self, issues: list, states: dict) -> Optional[LLMResponse]:
+    def _security_rules(self, issues: list, issues_lc: Tuple[str, ...], states: dict) -> Optional[LLMResponse]:
         """Security-specific Tier 1 rules"""
 
         # No issues
@@ -573,7 +939,7 @@ class HybridLLM:
         # Security issues need more analysis - escalate
         return None
 
-    def _climate_rules(self, issues: list, states: dict) -> Optional[LLMResponse]:
+    def _climate_rules(self, issues: list, issues_lc: Tuple[str, ...], states: dict) -> Optional[LLMResponse]:
         """Climate-specific Tier 1 rules"""
 
         # No issues
@@ -593,32 +959,57 @@ class HybridLLM:
         Tier 2: Local Ollama LLM analysis.
         Handles pattern analysis and moderate complexity decisions.
         """
+        if time.monotonic() < self._ollama_open_until:
+            logger.debug(f"[{agent_name}] Ollama circuit open - skipping Tier 2")
+            return None
+
         prompt = self._build_prompt(agent_name, context)
+        payload = {
+            "model": self.ollama_model,
+            "system": SYSTEM_PROMPT,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": self.ollama_keep_alive,
+            "options": {
+                "temperature": 0.3,
+                "num_predict": 500
+            }
+        }
 
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
+        # One retry for connection errors / 5xx; a timeout is not retried (it would just time out again)
+        for attempt in range(2):
+            try:
+                session = await self._get_session()
+                async with self._llm_sem, session.post(
                     f"{self.ollama_url}/api/generate",
-                    json={
-                        "model": self.ollama_model,
-                        "prompt": prompt,
-                        "stream": False,
-                        "options": {
-                            "temperature": 0.3,
-                            "num_predict": 500
-                        }
-                    },
-                    timeout=aiohttp.ClientTimeout(total=60)
+                    json=payload,
+                    timeout=OLLAMA_TIMEOUT
                 ) as resp:
                     if resp.status == 200:
                         data = await resp.json()
+                        self._ollama_failures.clear()
                         return self._parse_llm_response(data.get('response', ''), DecisionTier.OLLAMA_LOCAL)
-                    else:
-                        logger.warning(f"Ollama returned status {resp.status}")
+                    logger.warning(f"Ollama returned status {resp.status}")
+                    if resp.status < 500:
                         return None
-        except Exception as e:
-            logger.error(f"Ollama error: {e}")
-            return None
+            except asyncio.TimeoutError:
+                logger.error(f"Ollama timed out after {OLLAMA_TIMEOUT.total:.0f}s")
+                break
+            except Exception as e:
+                logger.error(f"Ollama error: {e}")
+
+        self._record_ollama_failure()
+        return None
+
+    def _record_ollama_failure(self):
+        """Open the circuit once enough failures land within the breaker window"""
+        now = time.monotonic()
+        failures = self._ollama_failures
+        failures.append(now)
+        if len(failures) == failures.maxlen and now - failures[0] <= OLLAMA_BREAKER["window"]:
+            self._ollama_open_until = now + OLLAMA_BREAKER["open"]
+            failures.clear()
+            logger.warning(f"Ollama failing repeatedly - skipping Tier 2 for {OLLAMA_BREAKER['open']}s")
 
     async def _tier3_claude(self, agent_name: str, context: Dict[str, Any],
                            tier2_result: Optional[LLMResponse]) -> Optional[LLMResponse]:
@@ -626,23 +1017,21 @@ class HybridLLM:
         Tier 3: Claude API for complex decisions.
         Only called when Tier 2 has low confidence or complex multi-system issues.
         """
-        if not self.claude_api_key:
+        if self._anthropic is None:
             return None
 
         prompt = self._build_prompt(agent_name, context, include_tier2=tier2_result)
 
         try:
-            # Using anthropic SDK
-            import anthropic
-            client = anthropic.Anthropic(api_key=self.claude_api_key)
-
-            message = client.messages.create(
-                model=self.claude_model,
-                max_tokens=500,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            async with self._llm_sem:
+                message = await self._anthropic.messages.create(
+                    model=self.claude_model,
+                    max_tokens=500,
+                    system=CLAUDE_SYSTEM_BLOCKS,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                )
 
             response_text = message.content[0].text
             return self._parse_llm_response(response_text, DecisionTier.CLAUDE_API)
@@ -653,20 +1042,24 @@ class HybridLLM:
 
     def _build_prompt(self, agent_name: str, context: Dict[str, Any],
                      include_tier2: Optional[LLMResponse] = None) -> str:
-        """Build the analysis prompt for LLM tiers"""
-
-        prompt = f"""You are a home automation {agent_name} agent analyzing the current system state.
-
-CURRENT STATE:
-{json.dumps(context.get('states', {}), indent=2)}
-
-DETECTED ISSUES:
-{json.dumps(context.get('issues', []), indent=2)}
-
-RECENT EVENTS:
-{json.dumps(context.get('recent_events', []), indent=2)}
+        """Build the per-call (user) part of the prompt; the static part is SYSTEM_PROMPT"""
 
-"""
+        states = context.get('states', {})
+        issues = context.get('issues', [])
+        issues_lc = context.get('_issues_lc')
+        if issues_lc is None:
+            issues_lc = tuple(issue.lower() for issue in issues)
+
+        # Only the states the issues refer to (all of them if none are named), as key=value lines
+        relevant = self._relevant_state_keys(states, issues_lc) or states.keys()
+        state_lines = "\n".join(f"{entity_id}={states[entity_id]}" for entity_id in relevant)
+        issue_lines = "\n".join(f"- {issue}" for issue in issues)
+        event_lines = "\n".join(_json_dumps(event) for event in context.get('recent_events', [])[-PROMPT_MAX_EVENTS:])
+
+        prompt = (f"AGENT: {agent_name}\n\n"
+                  f"CURRENT STATE:\n{state_lines}\n\n"
+                  f"DETECTED ISSUES:\n{issue_lines}\n\n"
+                  f"RECENT EVENTS:\n{event_lines or 'none'}\n\n")
         if include_tier2:
             prompt += f"""
 PREVIOUS ANALYSIS (low confidence):
@@ -677,31 +1070,36 @@ Reasoning: {include_tier2.reasoning}
 Please provide a more thorough analysis.
 """
 
-        prompt += """
-Respond in this exact JSON format:
-{
-  "decision": "action_name or no_action",
-  "confidence": 0.0 to 1.0,
-  "reasoning": "brief explanation",
-  "action_required": true/false,
-  "action": {"service": "...", "target": {"entity_id": "..."}} or null,
-  "is_critical": true/false
-}
-
-Be conservative - only recommend actions when clearly needed.
-"""
         return prompt
 
+    @staticmethod
+    def _relevant_state_keys(states: Dict[str, Any], issues_lc: Tuple[str, ...]) -> list:
+        """Entity IDs whose object id (the part after the domain) is mentioned in an issue,
+        plus the PROMPT_CORE_STATES present; empty if no issue names an entity.
+        Issues may name a device without its '_zwave' suffix (pool valves), so that is dropped before matching"""
+        text = "\n".join(issues_lc)
+        matched = [entity_id for entity_id in states
+                   if entity_id.partition('.')[2].lower().removesuffix('_zwave') in text]
+        if not matched:
+            return matched
+        core = [entity_id for entity_id in PROMPT_CORE_STATES
+                if entity_id in states and entity_id not in matched]
+        return core + matched
+
     def _parse_llm_response(self, response: str, tier: DecisionTier) -> Optional[LLMResponse]:
         """Parse LLM response into structured format"""
         try:
-            # Extract JSON from response
+            # Decode the first well-formed JSON object, skipping any prose or stray braces before it
+            data = None
             start = response.find('{')
-            end = response.rfind('}') + 1
-            if start >= 0 and end > start:
-                json_str = response[start:end]
-                data = json.loads(json_str)
+            while start >= 0:
+                try:
+                    data, _ = _DECODER.raw_decode(response, start)
+                    break
+                except ValueError:
+                    start = response.find('{', start + 1)
 
+            if data is not None:
                 return LLMResponse(
                     tier=tier,
                     decision=data.get('decision', 'no_action'),
@@ -723,6 +1121,7 @@ Be conservative - only recommend actions when clearly needed.
             "tier1_calls": self.tier1_calls,
             "tier2_calls": self.tier2_calls,
             "tier3_calls": self.tier3_calls,
+            "cache_hits": self.cache_hits,
             "total_calls": total,
             "tier1_pct": round(self.tier1_calls / total * 100, 1) if total > 0 else 0,
             "tier2_pct": round(self.tier2_calls / total * 100, 1) if total > 0 else 0,
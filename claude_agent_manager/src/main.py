@@ -5,12 +5,20 @@ Multi-agent system with Ollama (local) + Claude (fallback)
 
 import os
 import sys
+import time
+import signal
 import asyncio
 import logging
 from datetime import datetime
 
 from manager import AgentManager
 
+# Faster event loop for the HTTP/WebSocket polling (optional - stdlib loop otherwise)
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Configure logging
 log_level = os.environ.get('LOG_LEVEL', 'info').upper()
 logging.basicConfig(
@@ -33,6 +41,7 @@ async def main():
     logger.info(f"Claude API Key: {'configured' if os.environ.get('CLAUDE_API_KEY') else 'not configured'}")
     logger.info(f"Check Interval: {os.environ.get('CHECK_INTERVAL', '5')} minutes")
     logger.info(f"Confirm Critical: {os.environ.get('CONFIRM_CRITICAL', 'true')}")
+    logger.info(f"Event Loop: {type(asyncio.get_running_loop()).__module__}")
 
     # Initialize manager
     manager = AgentManager()
@@ -46,6 +55,9 @@ async def main():
         logger.error("Check SUPERVISOR_TOKEN and HA_URL environment variables")
         # Continue anyway - will retry on each cycle
 
+    # Keep states current over the WebSocket API (REST is used until it connects)
+    await manager.ha_client.ws_connect()
+
     # Get check interval
     check_interval = int(os.environ.get('CHECK_INTERVAL', '5'))
     interval_seconds = check_interval * 60
@@ -53,69 +65,93 @@ async def main():
     logger.info(f"Starting monitoring loop (every {check_interval} minutes)")
     logger.info("=" * 60)
 
+    # SIGTERM (container stop) / SIGINT end the wait between cycles immediately
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    # Load the Ollama model in the background so a slow load doesn't hold up the first checks
+    logger.info("Warming up Ollama model...")
+    warmup = asyncio.create_task(manager.llm.warmup())
+
     # Main loop
     cycle_count = 0
-    while True:
-        cycle_count += 1
-        logger.info(f"")
-        logger.info(f"{'='*20} CYCLE {cycle_count} {'='*20}")
-
-        try:
-            # Run monitoring cycle
-            results = await manager.run_cycle()
-
-            # Log results summary
-            for agent_name, agent_result in results.get('agents', {}).items():
-                issues = agent_result.get('issues', [])
-                decision = agent_result.get('decision', 'unknown')
-                tier = agent_result.get('tier', 'unknown')
-
-                if issues:
-                    logger.info(f"[{agent_name}] {len(issues)} issues → {decision} (Tier: {tier})")
-                else:
-                    logger.info(f"[{agent_name}] ✓ All normal")
-
-            # Log actions
-            actions_taken = results.get('actions_taken', [])
-            actions_pending = results.get('actions_pending', [])
-
-            if actions_taken:
-                logger.info(f"Actions executed: {len(actions_taken)}")
-                for action in actions_taken:
-                    logger.info(f"  → {action['agent']}: {action['decision']}")
-
-            if actions_pending:
-                logger.info(f"Actions pending confirmation: {len(actions_pending)}")
-                for action in actions_pending:
-                    logger.info(f"  ⏳ {action['agent']}: {action['decision']}")
-
-            # Log errors
-            errors = results.get('errors', [])
-            if errors:
-                logger.warning(f"Errors: {len(errors)}")
-                for error in errors:
-                    logger.warning(f"  ⚠ {error['agent']}: {error['error']}")
-
-            # Log LLM usage stats every 10 cycles
-            if cycle_count % 10 == 0:
-                stats = manager.get_stats()
-                llm_stats = stats.get('llm_stats', {})
-                logger.info(f"LLM Usage: Tier1={llm_stats.get('tier1_pct', 0)}%, "
-                          f"Tier2={llm_stats.get('tier2_pct', 0)}%, "
-                          f"Tier3={llm_stats.get('tier3_pct', 0)}%")
-
-        except Exception as e:
-            logger.error(f"Cycle failed with error: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-
-        # Wait for next cycle
-        logger.info(f"Next cycle in {check_interval} minutes...")
-        await asyncio.sleep(interval_seconds)
+    try:
+        while not stop.is_set():
+            cycle_count += 1
+            # Cycles start every interval_seconds regardless of how long each one takes
+            next_deadline = time.monotonic() + interval_seconds
+            logger.info("")
+            logger.info("%s CYCLE %d %s", "=" * 20, cycle_count, "=" * 20)
+
+            try:
+                # Run monitoring cycle
+                results = await manager.run_cycle()
+
+                # Log results summary (skipped entirely when INFO is off)
+                if logger.isEnabledFor(logging.INFO):
+                    for agent_name, agent_result in results.get('agents', {}).items():
+                        issues = agent_result.get('issues', [])
+                        decision = agent_result.get('decision', 'unknown')
+                        tier = agent_result.get('tier', 'unknown')
+
+                        if issues:
+                            logger.info("[%s] %d issues → %s (Tier: %s)", agent_name, len(issues), decision, tier)
+                        else:
+                            logger.info("[%s] ✓ All normal", agent_name)
+
+                    # Log actions
+                    actions_taken = results.get('actions_taken', [])
+                    actions_pending = results.get('actions_pending', [])
+
+                    if actions_taken:
+                        logger.info("Actions executed: %d", len(actions_taken))
+                        for action in actions_taken:
+                            logger.info("  → %s: %s", action['agent'], action['decision'])
+
+                    if actions_pending:
+                        logger.info("Actions pending confirmation: %d", len(actions_pending))
+                        for action in actions_pending:
+                            logger.info("  ⏳ %s: %s", action['agent'], action['decision'])
+
+                # Log errors
+                errors = results.get('errors', [])
+                if errors:
+                    logger.warning("Errors: %d", len(errors))
+                    for error in errors:
+                        logger.warning("  ⚠ %s: %s", error['agent'], error['error'])
+
+                # Log LLM usage stats every 10 cycles
+                if cycle_count % 10 == 0 and logger.isEnabledFor(logging.INFO):
+                    stats = manager.get_stats()
+                    llm_stats = stats.get('llm_stats', {})
+                    logger.info("LLM Usage: Tier1=%s%%, Tier2=%s%%, Tier3=%s%%",
+                                llm_stats.get('tier1_pct', 0),
+                                llm_stats.get('tier2_pct', 0),
+                                llm_stats.get('tier3_pct', 0))
+
+            except Exception as e:
+                # exc_info appends the traceback, formatted only when the record is emitted
+                logger.error("Cycle failed with error: %s", e, exc_info=True)
+
+            # Wait for next cycle (or a shutdown signal)
+            wait_seconds = max(0.0, next_deadline - time.monotonic())
+            logger.info("Next cycle in %.0f seconds...", wait_seconds)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=wait_seconds)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        logger.info("Shutting down...")
+        warmup.cancel()
+        await manager.close()
 
 
 if __name__ == "__main__":
     try:
+        if uvloop is not None:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Shutting down...")
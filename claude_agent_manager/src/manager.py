@@ -11,7 +11,7 @@ from dataclasses import dataclass, field
 
 from ha_client import HAClient
 from hybrid_llm import HybridLLM, LLMResponse, DecisionTier
-from agents import PoolAgent, LightsAgent, SecurityAgent, ClimateAgent, AgentCheck
+from agents import BaseAgent, PoolAgent, LightsAgent, SecurityAgent, ClimateAgent, AgentCheck
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +65,11 @@ class AgentManager:
         enabled_list = [a.strip() for a in enabled.split(',')]
         self.agents = {k: v for k, v in self.agents.items() if k in enabled_list}
 
+        # Only the enabled agents' entities need to be tracked from the WebSocket stream
+        self.ha_client.watch_entities(
+            entity_id for agent in self.agents.values() for entity_id in agent.monitored_entities
+        )
+
         logger.info(f"Manager initialized with agents: {list(self.agents.keys())}")
 
     async def run_cycle(self) -> Dict[str, Any]:
@@ -73,7 +78,7 @@ class AgentManager:
         Returns summary of findings and actions.
         """
         cycle_start = datetime.now()
-        logger.info(f"Starting monitoring cycle at {cycle_start.isoformat()}")
+        logger.info("Starting monitoring cycle at %s", cycle_start)
 
         results = {
             "cycle_time": cycle_start.isoformat(),
@@ -83,49 +88,25 @@ class AgentManager:
             "errors": []
         }
 
-        # Check each agent
+        # Agents are independent - check and analyze the due ones concurrently
+        due = []
         for agent_name, agent in self.agents.items():
-            try:
-                # Get agent's check results
-                check = await agent.check()
-                logger.info(f"[{agent_name}] Found {len(check.issues)} issues")
-
-                # If issues found, analyze with LLM
-                if check.issues:
-                    context = {
-                        "issues": check.issues,
-                        "states": check.states,
-                        "recent_events": check.recent_events
-                    }
-
-                    response = await self.llm.analyze(agent_name, context)
-
-                    results["agents"][agent_name] = {
-                        "issues": check.issues,
-                        "decision": response.decision,
-                        "confidence": response.confidence,
-                        "tier": response.tier.name,
-                        "action_required": response.action_required
-                    }
-
-                    # Handle the decision
-                    if response.action_required and response.action:
-                        await self._handle_action(agent_name, response, results)
-                else:
-                    results["agents"][agent_name] = {
-                        "issues": [],
-                        "decision": "all_normal",
-                        "confidence": 1.0,
-                        "tier": "RULE_BASED",
-                        "action_required": False
-                    }
-
-            except Exception as e:
-                logger.error(f"Error in {agent_name} agent: {e}")
-                results["errors"].append({
-                    "agent": agent_name,
-                    "error": str(e)
-                })
+            if agent.is_due():
+                due.append((agent_name, agent))
+            else:
+                logger.debug("[%s] Not due this cycle - skipping", agent_name)
+
+        agent_results = await asyncio.gather(*(self._run_agent(agent_name, agent)
+                                               for agent_name, agent in due))
+
+        # Merge in agent order so the summary reads the same as a sequential run
+        for agent_result in agent_results:
+            results["agents"].update(agent_result["agents"])
+            for key in ("actions_taken", "actions_pending", "errors"):
+                results[key].extend(agent_result[key])
+
+        # Send this cycle's notifications and logbook entries in one concurrent batch
+        await self.ha_client.flush_outbox()
 
         # Update state
         self.state.last_cycle = cycle_start
@@ -133,7 +114,60 @@ class AgentManager:
 
         # Log summary
         cycle_duration = (datetime.now() - cycle_start).total_seconds()
-        logger.info(f"Cycle completed in {cycle_duration:.2f}s")
+        logger.info("Cycle completed in %.2fs", cycle_duration)
+
+        return results
+
+    async def _run_agent(self, agent_name: str, agent: BaseAgent) -> Dict[str, Any]:
+        """Check one agent and handle its decision; returns this agent's share of the cycle results"""
+        results = {
+            "agents": {},
+            "actions_taken": [],
+            "actions_pending": [],
+            "errors": []
+        }
+
+        try:
+            # Get agent's check results
+            check = await agent.check()
+            logger.info("[%s] Found %d issues", agent_name, len(check.issues))
+
+            # If issues found, analyze with LLM
+            if check.issues:
+                context = {
+                    "issues": check.issues,
+                    "states": check.states,
+                    "recent_events": check.recent_events
+                }
+
+                response = await self.llm.analyze(agent_name, context)
+
+                results["agents"][agent_name] = {
+                    "issues": check.issues,
+                    "decision": response.decision,
+                    "confidence": response.confidence,
+                    "tier": response.tier.name,
+                    "action_required": response.action_required
+                }
+
+                # Handle the decision
+                if response.action_required and response.action:
+                    await self._handle_action(agent_name, response, results)
+            else:
+                results["agents"][agent_name] = {
+                    "issues": [],
+                    "decision": "all_normal",
+                    "confidence": 1.0,
+                    "tier": "RULE_BASED",
+                    "action_required": False
+                }
+
+        except Exception as e:
+            logger.error("Error in %s agent: %s", agent_name, e)
+            results["errors"].append({
+                "agent": agent_name,
+                "error": str(e)
+            })
 
         return results
 
@@ -173,8 +207,8 @@ class AgentManager:
             if len(self.state.recent_actions) > 50:
                 self.state.recent_actions = self.state.recent_actions[-50:]
 
-            # Log to HA
-            await self.ha_client.log_to_logbook(
+            # Log to HA (sent with the rest of the cycle's entries)
+            self.ha_client.queue_logbook(
                 name=f"Agent Manager - {agent_name}",
                 message=f"Action: {response.decision} - {response.reasoning}"
             )
@@ -201,8 +235,8 @@ class AgentManager:
 
         self.state.pending_actions.append(pending)
 
-        # Send notification to user
-        await self.ha_client.send_notification(
+        # Send notification to user (sent with the rest of the cycle's entries)
+        self.ha_client.queue_notification(
             title=f"🤖 Agent Action Requires Confirmation",
             message=(
                 f"**Agent**: {agent_name}\n"
@@ -263,6 +297,14 @@ class AgentManager:
 
         return False
 
+    async def close(self) -> None:
+        """Send anything still queued for HA and close the LLM and HA sessions"""
+        try:
+            await self.ha_client.flush_outbox()
+        finally:
+            await self.llm.close()
+            await self.ha_client.close()
+
     def get_stats(self) -> Dict[str, Any]:
         """Get manager statistics"""
         return {